@@ -5,7 +5,7 @@ a = Analysis(
     ['main.py'],
     pathex=[],
     binaries=[],
-    datas=[('config.txt', '.')],
+    datas=[('config.txt', '.'), ('templates.txt', '.')],
     hiddenimports=[],
     hookspath=[],
     hooksconfig={},
@@ -0,0 +1,309 @@
+import collections
+import gzip
+import hashlib
+import os
+import shutil
+import stat
+import tarfile
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from profiling import span
+from project_index import ArchiveRecord, find_modes
+
+# Project archiving: a project folder becomes a single <project>.tar.gz file in its category.
+#
+# the project is streamed into a tar, the tar stream is cut into chunks that are gzip-compressed in a process pool
+# and written in order. gzip members written one after another are a valid .tar.gz (like pigz),
+# any tool that opens .tar.gz files opens the archive (it is read back with gzip.GzipFile, which reads every member).
+# at most a few chunks per worker are held in memory, whatever the size of the recordings.
+# before the project folder is removed, the archive is read back and every file is compared (size and sha256)
+# with what was read while archiving, and the archive is recorded in the project index.
+# files that cannot be removed (in use, read-only) are reported, the archive stays restorable from the app.
+# a project with links or devices is refused before anything is written, restore_project would reject them.
+# restoring extracts into a hidden folder in the category and renames it into place
+# once the archive's checksum has been verified.
+
+ARCHIVE_SUFFIX = ".tar.gz"
+PART_SUFFIX = ".part"
+RESTORE_PREFIX = ".scfh-restore-"  # hidden folder in the category while a project is restored
+CHUNK_SIZE = 8 * 1024 * 1024  # of the tar stream, compressed by one worker
+COMPRESS_LEVEL = 6
+DEFAULT_WORKERS = max(1, min(4, (os.cpu_count() or 2) - 1))
+READ_SIZE = 1024 * 1024
+
+
+class ArchiveError(Exception):
+    """raised when a project cannot be archived or restored, nothing has been removed."""
+
+
+def compress_chunk(data):
+    """runs in a worker process."""
+    return gzip.compress(data, COMPRESS_LEVEL)
+
+
+class ParallelGzipWriter:
+    """
+    a write-only file object for tarfile's stream mode, the written bytes are cut into chunks
+    that are compressed in a process pool. the compressed chunks are written in order.
+    """
+    def __init__(self, target, pool, workers):
+        self.target = target
+        self.pool = pool
+        self.max_pending:int = workers * 2  # bounds the memory: chunks waiting to be compressed or written
+        self.pending = collections.deque()
+        self.buffer = bytearray()
+        self.digest = hashlib.sha256()  # of the compressed archive
+        self.size:int = 0
+
+    def write(self, data):
+        self.buffer += data
+        while len(self.buffer) >= CHUNK_SIZE:
+            self.submit(bytes(self.buffer[:CHUNK_SIZE]))
+            del self.buffer[:CHUNK_SIZE]
+        return len(data)
+
+    def submit(self, chunk):
+        if len(self.pending) >= self.max_pending:
+            self.write_compressed(self.pending.popleft().result())
+        self.pending.append(self.pool.submit(compress_chunk, chunk))
+
+    def write_compressed(self, compressed):
+        self.target.write(compressed)
+        self.digest.update(compressed)
+        self.size += len(compressed)
+
+    def close(self):
+        """compresses the rest and writes every pending chunk."""
+        if self.buffer:
+            self.submit(bytes(self.buffer))
+            self.buffer = bytearray()
+        while self.pending:
+            self.write_compressed(self.pending.popleft().result())
+
+
+class HashingReader:
+    """reads a file through, keeping the sha256 and size of what was read."""
+    def __init__(self, f, on_bytes=None):
+        self.f = f
+        self.digest = hashlib.sha256()
+        self.size:int = 0
+        self.on_bytes = on_bytes
+
+    def read(self, size=-1):
+        data = self.f.read(size)
+        self.digest.update(data)
+        self.size += len(data)
+        if self.on_bytes is not None and data:
+            self.on_bytes(len(data))
+        return data
+
+
+def list_project_folders(category_path):
+    """names of the project folders of a category, sorted, without unfinished restores."""
+    with os.scandir(category_path) as entries:
+        return sorted(entry.name for entry in entries if entry.is_dir() and not entry.name.startswith(RESTORE_PREFIX))
+
+
+def archive_path(project_path):
+    return project_path.rstrip("/\\") + ARCHIVE_SUFFIX
+
+
+def project_files(project_path):
+    """
+    :return: (list of (path, name inside the archive), total size of the files), folders before their contents.
+    :raises ArchiveError: the project has a link, it could not be restored (see restorable)
+    """
+    name = os.path.basename(project_path.rstrip("/\\"))
+    entries = []
+    total = 0
+    for folder, folders, files in os.walk(project_path):
+        folders.sort()
+        for entry_name in folders + files:
+            if os.path.islink(os.path.join(folder, entry_name)):
+                raise ArchiveError(f"{os.path.join(folder, entry_name)} is a link, it cannot be archived")
+        relative = os.path.relpath(folder, project_path)
+        folder_name = name if relative == "." else "/".join([name] + relative.split(os.sep))
+        entries.append((folder, folder_name))
+        for file_name in sorted(files):
+            path = os.path.join(folder, file_name)
+            entries.append((path, folder_name + "/" + file_name))
+            total += os.path.getsize(path)
+    return entries, total
+
+
+def write_archive(project_path, target_path, workers=DEFAULT_WORKERS, progress=None, cancel_event=None):
+    """
+    streams the project into target_path.
+    :param progress: called with (bytes read, total bytes)
+    :return: (dict of name inside the archive -> (size, sha256) of every file, ParallelGzipWriter)
+    """
+    entries, total = project_files(project_path)
+    project_name = os.path.basename(project_path.rstrip("/\\"))
+    expected = {}
+    done = [0]
+
+    def on_bytes(size):
+        done[0] += size
+        if progress is not None:
+            progress((done[0], total))
+
+    with open(target_path, "wb") as target, ProcessPoolExecutor(max_workers=workers) as pool:
+        writer = ParallelGzipWriter(target, pool, workers)
+        with tarfile.open(fileobj=writer, mode="w|", format=tarfile.PAX_FORMAT) as tar:
+            for path, name in entries:
+                if cancel_event is not None and cancel_event.is_set():
+                    raise ArchiveError("archiving has been cancelled")
+                info = tar.gettarinfo(path, arcname=name)
+                if not restorable(info, project_name):  # e.g. a hard link or a device
+                    raise ArchiveError(f"{path} is not a plain file or folder, it cannot be archived")
+                if not info.isfile():
+                    tar.addfile(info)
+                    continue
+                with open(path, "rb") as f:
+                    reader = HashingReader(f, on_bytes)
+                    tar.addfile(info, reader)
+                if reader.size != info.size:
+                    raise ArchiveError(f"{path} changed while it was archived")
+                expected[name] = (info.size, reader.digest.hexdigest())
+        writer.close()
+        target.flush()
+        os.fsync(target.fileno())
+    return expected, writer
+
+
+def verify_archive(path, expected, project_name):
+    """
+    reads the whole archive back, every file must be there with the same size and sha256,
+    and every entry must pass the checks of restore_project (see restorable).
+    :raises ArchiveError: on the first difference
+    """
+    found = set()
+    try:
+        with gzip.open(path, "rb") as f, tarfile.open(fileobj=f, mode="r|") as tar:
+            for member in tar:
+                if not restorable(member, project_name):
+                    raise ArchiveError(f"{member.name} in the archive could not be restored")
+                if not member.isfile():
+                    continue
+                size, checksum = expected.get(member.name, (None, None))
+                digest = hashlib.sha256()
+                member_file = tar.extractfile(member)
+                for block in iter(lambda: member_file.read(READ_SIZE), b""):
+                    digest.update(block)
+                if member.size != size or digest.hexdigest() != checksum:
+                    raise ArchiveError(f"{member.name} in the archive does not match the project")
+                found.add(member.name)
+    except (OSError, tarfile.TarError, EOFError) as error:
+        raise ArchiveError(f"the archive could not be read back: {error}") from error
+    missing = set(expected) - found
+    if missing:
+        raise ArchiveError(f"{len(missing)} files are missing from the archive, e.g. {sorted(missing)[0]}")
+
+
+def archive_project(project_path, index, workers=DEFAULT_WORKERS, progress=None, cancel_event=None):
+    """
+    archives a project into <project>.tar.gz next to it, verifies it, records it in the project index,
+    then removes the project folder.
+    :param index: ProjectIndex the archive is recorded in, before anything is removed
+    :return: (ArchiveRecord, list of paths that could not be removed, e.g. files in use)
+    :raises ArchiveError: the project folder is kept and no archive is left behind
+    """
+    project_path = project_path.rstrip("/\\")
+    target = archive_path(project_path)
+    if os.path.exists(target):
+        raise ArchiveError(f"{os.path.basename(target)} already exists in the category")
+    part = target + PART_SUFFIX
+    modes = find_modes(project_path)
+    try:
+        with span("archive.write"):
+            expected, writer = write_archive(project_path, part, workers, progress, cancel_event)
+        with span("archive.verify"):
+            verify_archive(part, expected, os.path.basename(project_path))
+        os.rename(part, target)
+    except BaseException:
+        try:
+            os.remove(part)
+        except OSError:
+            pass
+        raise
+    category_path = os.path.dirname(project_path)
+    record = ArchiveRecord(target, os.path.basename(category_path), category_path, os.path.basename(project_path),
+                           time.time(), writer.size, sum(size for size, checksum in expected.values()), len(expected),
+                           writer.digest.hexdigest(), modes)
+    if not index.add_archive(record):
+        os.remove(target)
+        raise ArchiveError("the archive could not be recorded in the project index, the project was kept")
+    with span("archive.remove_project"):
+        leftovers = remove_tree(project_path)
+    return record, leftovers
+
+
+def remove_tree(path):
+    """
+    removes a folder tree, read-only files too (Windows), without stopping at the first error.
+    :return: list of paths that could not be removed
+    """
+    leftovers = []
+
+    def on_error(function, failed_path, exc_info):
+        if function in (os.unlink, os.rmdir) and isinstance(exc_info[1], PermissionError):
+            try:
+                os.chmod(failed_path, stat.S_IWRITE)  # read-only
+                function(failed_path)
+                return
+            except OSError:
+                pass
+        leftovers.append(failed_path)
+
+    shutil.rmtree(path, onerror=on_error)
+    return leftovers
+
+
+def restorable(member, project_name):
+    """members of the project folder only, no absolute paths, '..', links or devices."""
+    parts = member.name.split("/")
+    return not (parts[0] != project_name or ".." in parts or member.name.startswith("/") or member.issym()
+                or member.islnk() or member.isdev())
+
+
+def safe_members(tar, project_name):
+    """the members of the archive, checked with restorable."""
+    for member in tar:
+        if not restorable(member, project_name):
+            raise ArchiveError(f"the archive has an unexpected entry: {member.name}")
+        yield member
+
+
+def restore_project(record, progress=None):
+    """
+    extracts an archived project back into its category, then removes the archive.
+    the archive is checked against the sha256 recorded when it was made, while it is extracted.
+    :param record: ArchiveRecord from the project index
+    :raises ArchiveError: nothing has been restored, the archive is kept
+    """
+    if os.path.exists(record.project_path):
+        raise ArchiveError(f"{record.name} already exists in {record.category}")
+    staging = tempfile.mkdtemp(prefix=RESTORE_PREFIX, dir=record.category_path)
+    try:
+        with span("archive.restore"), open(record.path, "rb") as f:
+            reader = HashingReader(f)
+            if progress is not None:
+                reader.on_bytes = lambda size: progress((reader.size, record.size))
+            try:
+                with gzip.GzipFile(fileobj=reader, mode="rb") as unpacked, \
+                        tarfile.open(fileobj=unpacked, mode="r|") as tar:
+                    for member in safe_members(tar, record.name):
+                        tar.extract(member, staging)
+                for block in iter(lambda: reader.read(READ_SIZE), b""):
+                    pass  # the rest of the file counts for the checksum too
+            except (tarfile.TarError, EOFError, OSError) as error:
+                raise ArchiveError(f"the archive could not be read: {error}") from error
+            if reader.digest.hexdigest() != record.sha256:
+                raise ArchiveError("the archive has changed since it was made, it was not restored")
+        os.rename(os.path.join(staging, record.name), record.project_path)
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+    os.remove(record.path)
+    return record.project_path
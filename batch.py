@@ -0,0 +1,201 @@
+import argparse
+import csv
+import json
+import os
+import sys
+
+from folder_plan import (plan_project, create_project, check_folder_name, cleanup_stale_staging, CreationFailed,
+                         InvalidNameError)
+from profiling import span
+from settings import app_file, get_settings
+from templates import DEFAULT_TEMPLATE_NAME, MODES_ONLY_TEMPLATE_NAME, load_templates
+
+# Batch mode creates many projects from a manifest in one process, without opening the app window.
+# Never import functions here, it builds the Tk window.
+#
+# CSV manifest (first line is the header):
+#   project,category,modes,inner_folders,template
+#   Site A,Antennas,Mode1;Mode2,1,
+# JSON-lines manifest (one project per line):
+#   {"project": "Site A", "category": "Antennas", "modes": ["Mode1", "Mode2"], "inner_folders": true}
+#
+# empty category -> uncategorized folder, empty project -> local date and time, inner_folders defaults to on.
+# template is a template name from templates.txt, it replaces inner_folders when given.
+
+SUMMARY_FILE = "batch_summary.txt"  # next to the exe, the packed app has no console to print to
+MODES_SEPARATOR = ";"  # separates modes inside a single CSV cell
+TRUE_VALUES = ("1", "true", "yes", "y", "on")
+FALSE_VALUES = ("0", "false", "no", "n", "off")
+
+
+class ManifestError(ValueError):
+    """raised when a manifest row can not be turned into a project."""
+
+
+def read_manifest(manifest_path, manifest_format=None):
+    """
+    Streams the manifest rows one by one, so a huge manifest is never loaded at once.
+    :param manifest_path: path to a .csv or .jsonl file
+    :param manifest_format: "csv" or "jsonl", guessed from the file extension if None
+    :return: generator of (row number, row dict)
+    """
+    if manifest_format is None:
+        manifest_format = "csv" if manifest_path.lower().endswith(".csv") else "jsonl"
+    with open(manifest_path, "r", encoding="utf-8-sig", newline="") as f:  # utf-8-sig handles Excel's BOM
+        if manifest_format == "csv":
+            for row_number, row in enumerate(csv.DictReader(f), start=2):  # row 1 is the header
+                yield row_number, row
+        else:
+            for row_number, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except ValueError as error:
+                    yield row_number, ManifestError(f"invalid JSON: {error}")
+                    continue
+                if not isinstance(row, dict):
+                    row = ManifestError("every line must be a JSON object")
+                yield row_number, row
+
+
+def text_value(row, key):
+    """a text column of the row, "" if it is missing. JSON values of another type fail the row."""
+    value = row.get(key)
+    if value is None:
+        return ""
+    if not isinstance(value, str):
+        raise ManifestError(f"{key} must be text, not {type(value).__name__}: {value!r}")
+    return value.strip()
+
+
+def parse_modes(value):
+    """modes can be a list of strings (JSON) or a ';' separated string (CSV)."""
+    if value is None:
+        return []
+    if isinstance(value, str):
+        value = value.split(MODES_SEPARATOR)
+    if not isinstance(value, list) or not all(isinstance(mode, str) for mode in value):
+        raise ManifestError(f"modes must be text or a list of text: {value!r}")
+    return [mode.strip() for mode in value if mode.strip()]
+
+
+def parse_inner_folders(value):
+    """inner folders flag, on by default just like the switch in the Configure tab."""
+    if value is None or value == "":
+        return True
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in TRUE_VALUES:
+        return True
+    if text in FALSE_VALUES:
+        return False
+    raise ManifestError(f"invalid inner_folders value: {value!r}")
+
+
+def choose_template(templates, row):
+    """the row's template, or the built-in template matching its inner_folders flag."""
+    name = text_value(row, "template")
+    if not name:
+        name = DEFAULT_TEMPLATE_NAME if parse_inner_folders(row.get("inner_folders")) else MODES_ONLY_TEMPLATE_NAME
+    if name not in templates:
+        raise ManifestError(f"template not found: {name}")
+    return templates[name]
+
+
+def create_project_from_row(main_folder, row, templates, staged=False):
+    """
+    Creates a single project from a manifest row.
+    :param templates: dict of template name -> FolderTemplate, compiled once for the whole manifest
+    :param staged: build in a hidden staging folder and publish at once, an existing project fails the row
+    :return: CreationReport
+    :raises ManifestError: invalid row
+    :raises InvalidNameError: the category, the project or a mode name is not a valid folder name
+    :raises CreationFailed: the project could not be created, it has been rolled back
+    """
+    if isinstance(row, ManifestError):
+        raise row
+    category = text_value(row, "category")
+    category_path = ""
+    if category:
+        check_folder_name("category", category)  # a category is a folder right inside the main folder
+        category_path = os.path.join(main_folder, category)
+        if not os.path.isdir(category_path):
+            raise ManifestError(f"category not found: {category}")
+    plan = plan_project(main_folder, category_path, text_value(row, "project"),
+                        parse_modes(row.get("modes")), choose_template(templates, row))
+    return create_project(plan, staged=staged)  # a failed row is rolled back, no half built project is left behind
+
+
+def run_batch(manifest_path, main_folder, manifest_format=None, out=None, templates_file=None, staged=False):
+    """
+    Creates every project in the manifest and writes a summary line per row.
+    a failed row does not stop the rest of the manifest.
+    :return: number of failed rows, a manifest that could not be read to the end counts as one more
+    """
+    out = out or sys.stdout
+    templates, errors = load_templates(templates_file)
+    for error in errors:
+        print(f"template skipped - {error}", file=out)
+    if staged:
+        cleanup_stale_staging(main_folder)
+    failed = 0
+    total = 0
+    read_failed = 0
+    try:
+        for row_number, row in read_manifest(manifest_path, manifest_format):
+            total += 1
+            try:
+                with span("batch.row"):
+                    report = create_project_from_row(main_folder, row, templates, staged)
+            except (ManifestError, InvalidNameError, CreationFailed, OSError) as error:
+                failed += 1
+                print(f"row {row_number}: FAILED - {error}", file=out)
+                continue
+            print(f"row {row_number}: OK - {report.project_path} "
+                  f"(created {len(report.created)}, existed {len(report.existed)})", file=out)
+    except (OSError, UnicodeDecodeError, csv.Error) as error:  # raised while reading the manifest, not by a row
+        read_failed = 1
+        print(f"manifest could not be read after {total} rows, the rest was skipped - {error}", file=out)
+    print(f"{total - failed} of {total} projects created.", file=out)
+    return failed + read_failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="SCFHV1.2 batch",
+                                     description="Create many projects from a CSV or JSON-lines manifest.")
+    parser.add_argument("manifest", help="path to a .csv or .jsonl manifest")
+    parser.add_argument("--main-folder", default=None, help="main directory, defaults to the one in the app settings")
+    parser.add_argument("--format", choices=("csv", "jsonl"), default=None, dest="manifest_format",
+                        help="manifest format, guessed from the file extension by default")
+    parser.add_argument("--templates", default=None, help="template file, defaults to templates.txt of the app")
+    parser.add_argument("--staged", action="store_true", default=None,
+                        help="build each project in a hidden folder and publish it at once, "
+                             "defaults to the app setting")
+    parser.add_argument("--summary", default=None,
+                        help="write the summary to this file instead of the console, "
+                             f"the packed exe always writes it to a file ({SUMMARY_FILE} next to the exe by default)")
+    args = parser.parse_args(argv)
+    if not os.path.isfile(args.manifest):
+        parser.error(f"manifest not found: {args.manifest}")
+
+    main_folder = args.main_folder or get_settings().get("main_folder")
+    staged = args.staged if args.staged is not None else get_settings().get("staged_creation")
+    if not os.path.isdir(main_folder):
+        parser.error(f"main folder not found: {main_folder}")
+
+    summary = args.summary
+    if summary is None and getattr(sys, "frozen", False):  # built with console=False, nothing to print to
+        summary = app_file(SUMMARY_FILE)
+    if summary:
+        with open(summary, "w", encoding="utf-8") as summary_file:
+            failed = run_batch(args.manifest, main_folder, args.manifest_format, summary_file, args.templates, staged)
+    else:
+        failed = run_batch(args.manifest, main_folder, args.manifest_format,
+                           templates_file=args.templates, staged=staged)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,234 @@
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+from categories import CategoryIndex, CategorySearch, scan_categories
+from folder_plan import plan_project, execute_plan
+from modes import ModeList, parse_modes_text
+from profiling import FS_CALLS
+from project_index import ProjectIndex
+from templates import builtin_templates, DEFAULT_TEMPLATE_NAME
+
+# Benchmarks of the hot paths, headless (never imports functions / customtkinter).
+# builds a synthetic "Iron Swords War" tree in a temp directory and times:
+#   - the category listing (cold scan, warm cached refresh) and the category search
+#   - the folder creation behind folder_creation_handler, next to the old makedirs loop
+#   - the mode list handling behind AddModeLogic, next to the old list based dedupe
+#   - the project index (cold build, warm update)
+# --latency-ms adds a delay to every filesystem call to mimic a network share.
+# results are printed and written as JSON (--output), --compare prints the change against an older run.
+#
+#   python benchmark.py --output before.json
+#   python benchmark.py --output after.json --compare before.json
+
+
+class LatencyFS:
+    """adds a fixed delay to every os filesystem call while active, like a round trip to a network share."""
+    def __init__(self, latency):
+        self.latency:float = latency
+        self.originals:dict = {}
+
+    def __enter__(self):
+        if self.latency <= 0:
+            return self
+        for call in FS_CALLS:
+            original = getattr(os, call)
+            self.originals[call] = original
+            setattr(os, call, self.slowed(original))
+        return self
+
+    def __exit__(self, *exc_info):
+        for call, original in self.originals.items():
+            setattr(os, call, original)
+        self.originals = {}
+        return False
+
+    def slowed(self, original):
+        def wrapper(*args, **kwargs):
+            time.sleep(self.latency)
+            return original(*args, **kwargs)
+        return wrapper
+
+
+def generate_tree(main_folder, categories, projects, modes):
+    """
+    creates the synthetic main folder: categories with project histories,
+    every project has Recordings/Pictures with some modes, and a few loose files.
+    """
+    mode_names = [f"Mode {m:03d}" for m in range(modes)]
+    for c in range(categories):
+        category_path = os.path.join(main_folder, f"Category {c:04d}")
+        os.mkdir(category_path)
+        for p in range(projects):
+            project_path = os.path.join(category_path, f"Project {p:03d}")
+            for inner_folder in ("Recordings", "Pictures"):
+                for mode in mode_names:
+                    os.makedirs(os.path.join(project_path, inner_folder, mode))
+            with open(os.path.join(project_path, "notes.txt"), "w") as f:
+                f.write("synthetic")
+    with open(os.path.join(main_folder, "readme.txt"), "w") as f:
+        f.write("not a category")
+
+
+def legacy_create(project_path, modes_list):
+    """the folder creation loop of V1.2, kept only to compare against."""
+    os.makedirs(project_path, exist_ok=True)
+    for subfolder in ['Recordings', 'Pictures']:
+        subfolder_path = os.path.join(project_path, subfolder)
+        os.makedirs(subfolder_path, exist_ok=True)
+        for mode in modes_list:
+            os.makedirs(os.path.join(subfolder_path, mode), exist_ok=True)
+
+
+def legacy_modes(modes):
+    """the mode list handling of V1.2: list scan per mode and a full re-join per addition."""
+    entries_list = []
+    display = ""
+    for entry_text in modes:
+        if entry_text not in entries_list and entry_text.strip():
+            entries_list.append(entry_text)
+            display = "\n".join(entries_list)
+    return display
+
+
+def time_it(function, repeat, setup=None):
+    """runs setup() (untimed) and function() repeat times, returns the durations in seconds."""
+    durations = []
+    for _ in range(repeat):
+        argument = setup() if setup is not None else None
+        start = time.perf_counter()
+        function(argument) if setup is not None else function()
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+def result(name, durations, **details):
+    entry = {"name": name, "repeat": len(durations), "min": min(durations),
+             "median": statistics.median(durations), "mean": statistics.mean(durations)}
+    entry.update(details)
+    return entry
+
+
+def run_benchmarks(work_folder, args):
+    results = []
+    main_folder = os.path.join(work_folder, "Iron Swords War")
+    os.mkdir(main_folder)
+    generate_tree(main_folder, args.categories, args.projects, args.project_modes)
+    first_category = os.path.join(main_folder, "Category 0000")
+    template = builtin_templates()[DEFAULT_TEMPLATE_NAME]
+    mode_names = [f"Mode {m:04d}" for m in range(args.modes)]
+
+    with LatencyFS(args.latency_ms / 1000):
+        results.append(result("categories.scan", time_it(lambda: scan_categories(main_folder), args.repeat),
+                              categories=args.categories))
+
+        index = CategoryIndex(main_folder, os.path.join(work_folder, "categories_cache.json"))
+        index.refresh()
+        results.append(result("categories.refresh_unchanged", time_it(index.refresh, args.repeat)))
+
+        names = list(scan_categories(main_folder))
+        results.append(result("categories.search_build", time_it(lambda: CategorySearch(names), args.repeat)))
+        search = CategorySearch(names)
+        results.append(result("categories.search_typing", time_it(
+            lambda: [search.search(query) for query in ("c", "ca", "cat", "cate", "categ", "y 00", "y 001")],
+            args.repeat)))
+
+        counter = iter(range(10 ** 9))
+
+        def new_project():
+            return f"New Project {next(counter)}"
+
+        results.append(result("folders.create_new", time_it(
+            lambda name: execute_plan(plan_project(main_folder, first_category, name, mode_names, template)),
+            args.repeat, new_project), modes=args.modes))
+        results.append(result("folders.create_new_legacy", time_it(
+            lambda name: legacy_create(os.path.join(first_category, name), mode_names),
+            args.repeat, new_project), modes=args.modes))
+
+        existing = plan_project(main_folder, first_category, "Existing", mode_names, template)
+        execute_plan(existing)
+        results.append(result("folders.create_existing", time_it(lambda: execute_plan(existing), args.repeat),
+                              modes=args.modes))
+        results.append(result("folders.create_existing_legacy", time_it(
+            lambda: legacy_create(existing.project_path, mode_names), args.repeat), modes=args.modes))
+
+        project_index = ProjectIndex(main_folder, os.path.join(work_folder, "project_index.db"))
+        results.append(result("project_index.update_cold", time_it(project_index.update, 1),
+                              projects=args.categories * args.projects))
+        results.append(result("project_index.update_warm", time_it(project_index.update, args.repeat)))
+
+    def add_one_by_one():
+        mode_list = ModeList()
+        for mode in mode_names:
+            mode_list.add(mode)
+
+    pasted = "\n".join(mode_names + mode_names[: args.modes // 10])  # with some duplicates
+    results.append(result("modes.add_one_by_one", time_it(add_one_by_one, args.repeat), modes=args.modes))
+    results.append(result("modes.bulk_paste", time_it(lambda: ModeList(parse_modes_text(pasted)), args.repeat),
+                          modes=args.modes))
+    results.append(result("modes.legacy_one_by_one", time_it(lambda: legacy_modes(mode_names), args.repeat),
+                          modes=args.modes))
+    return results
+
+
+def compare(results, previous_path):
+    """prints the median change of every benchmark against an older results file."""
+    with open(previous_path, "r", encoding="utf-8") as f:
+        previous = {entry["name"]: entry for entry in json.load(f)["results"]}
+    print(f"\n{'benchmark':<36}{'before ms':>12}{'after ms':>12}{'change':>10}")
+    for entry in results:
+        before = previous.get(entry["name"])
+        if before is None:
+            continue
+        change = (entry["median"] / before["median"] - 1) * 100 if before["median"] else 0.0
+        print(f"{entry['name']:<36}{before['median'] * 1000:>12.2f}{entry['median'] * 1000:>12.2f}{change:>+9.1f}%")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks of the category scan, folder creation and modes.")
+    parser.add_argument("--categories", type=int, default=2000, help="categories in the synthetic main folder")
+    parser.add_argument("--projects", type=int, default=5, help="projects per category")
+    parser.add_argument("--project-modes", type=int, default=3, help="modes per synthetic project")
+    parser.add_argument("--modes", type=int, default=300, help="modes of the created project and the mode list")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="delay added to every filesystem call")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--quick", action="store_true", help="small tree, for a fast check")
+    parser.add_argument("--output", default=None, help="write the results as JSON to this file")
+    parser.add_argument("--compare", default=None, help="results JSON of an older run to compare against")
+    parser.add_argument("--keep", action="store_true", help="keep the synthetic tree (its path is printed)")
+    args = parser.parse_args(argv)
+    if args.quick:
+        args.categories, args.projects, args.modes, args.repeat = 100, 2, 50, 3
+
+    work_folder = tempfile.mkdtemp(prefix="scfh-bench-")
+    try:
+        results = run_benchmarks(work_folder, args)
+    finally:
+        if args.keep:
+            print(f"synthetic tree kept in {work_folder}")
+        else:
+            shutil.rmtree(work_folder, ignore_errors=True)
+
+    report = {"python": sys.version.split()[0], "platform": platform.platform(), "time": time.time(),
+              "settings": {key: value for key, value in vars(args).items()
+                           if key not in ("output", "compare", "keep")},
+              "results": results}
+    print(f"{'benchmark':<36}{'median ms':>12}{'min ms':>12}")
+    for entry in results:
+        print(f"{entry['name']:<36}{entry['median'] * 1000:>12.2f}{entry['min'] * 1000:>12.2f}")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        compare(results, args.compare)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,122 @@
+import bisect
+import json
+import os
+
+from folder_plan import STAGING_FOLDER
+from profiling import span
+from settings import app_file, atomic_write
+
+CATEGORY_CACHE_FILE = "categories_cache.json"  # next to the executable, lets the app paint before the share answers
+
+
+def scan_categories(main_folder):
+    """
+    Lists the category folders of the main directory in a single os.scandir pass.
+    plain files and the hidden staging folder are skipped,
+    scandir already knows the entry type so no extra stat is needed on Windows.
+    :param main_folder: main directory
+    :return: dict, key: category name, value: category path. sorted by name.
+    """
+    with span("categories.scan"), os.scandir(main_folder) as entries:
+        categories = [(entry.name, entry.path) for entry in entries
+                      if entry.is_dir() and entry.name != STAGING_FOLDER]
+    categories.sort()
+    return dict(categories)
+
+
+class CategoryIndex:
+    """
+    Categories of the main directory, backed by a small cache file keyed by the main folder's mtime.
+    load_cache is local and instant, refresh touches the share and is meant to run in a background thread.
+    """
+    def __init__(self, main_folder, cache_file=None):
+        self.main_folder:str = main_folder
+        self.cache_file:str = cache_file or app_file(CATEGORY_CACHE_FILE)
+        self.cat_dict:dict = {}
+        self.mtime = None  # mtime of the main folder when cat_dict was scanned
+
+    def load_cache(self):
+        """
+        loads the categories from the cache file, ignores a cache of another main folder.
+        :return: True if categories were loaded
+        """
+        try:
+            with open(self.cache_file, "r", encoding="utf-8") as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if not isinstance(cache, dict) or cache.get("main_folder") != self.main_folder:
+            return False
+        self.cat_dict = dict(cache.get("categories", {}))
+        self.mtime = cache.get("mtime")
+        return True
+
+    def save_cache(self):
+        cache = {"main_folder": self.main_folder, "mtime": self.mtime, "categories": self.cat_dict}
+        try:
+            # atomic, the CategoriesLogic of every tab may save it while another one is loading it
+            atomic_write(self.cache_file, lambda f: json.dump(cache, f, ensure_ascii=False), ".categories-")
+        except OSError:
+            pass  # the cache is only a speedup, the app works without it
+
+    def refresh(self):
+        """
+        re-scans the main folder only if its mtime has changed since the last scan.
+        adding, removing or renaming a category changes the main folder's mtime.
+        :return: True if the categories have changed
+        """
+        with span("categories.refresh_stat"):
+            mtime = os.stat(self.main_folder).st_mtime
+        if mtime == self.mtime:
+            return False
+        cat_dict = scan_categories(self.main_folder)
+        changed = cat_dict != self.cat_dict
+        self.cat_dict = cat_dict
+        self.mtime = mtime
+        self.save_cache()
+        return changed
+
+
+class CategorySearch:
+    """
+    Type-to-filter search over the category names, built once per category scan.
+    prefix matches come from a sorted key list (bisect), substring matches are narrowed incrementally:
+    typing one more letter only filters the previous result instead of the whole category list.
+    """
+    def __init__(self, names):
+        self.names:list = list(names)  # display order
+        self.keys:list = [name.casefold() for name in self.names]
+        self.sorted_keys:list = sorted((key, i) for i, key in enumerate(self.keys))
+        self.last_query:str = ""
+        self.last_matches:list = list(range(len(self.names)))
+
+    def prefix_matches(self, query):
+        """indices of names that start with query, O(log n) to find plus the matches themselves."""
+        start = bisect.bisect_left(self.sorted_keys, (query,))
+        matches = []
+        while start < len(self.sorted_keys) and self.sorted_keys[start][0].startswith(query):
+            matches.append(self.sorted_keys[start][1])
+            start += 1
+        return matches
+
+    def search(self, query):
+        """
+        :param query: text typed by the user, case insensitive
+        :return: matching names, names that start with query first, then names that contain it
+        """
+        query = query.strip().casefold()
+        if not query:
+            self.last_query = ""
+            self.last_matches = list(range(len(self.names)))
+            return list(self.names)
+        if self.last_query and query.startswith(self.last_query):
+            candidates = self.last_matches  # a longer query can only match a subset
+        else:
+            candidates = range(len(self.names))
+        matches = [i for i in candidates if query in self.keys[i]]
+        self.last_query = query
+        self.last_matches = matches
+
+        prefix = self.prefix_matches(query)
+        prefix_set = set(prefix)
+        return [self.names[i] for i in prefix] + [self.names[i] for i in matches if i not in prefix_set]
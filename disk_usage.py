@@ -0,0 +1,185 @@
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from categories import scan_categories
+from profiling import span
+from settings import app_file, atomic_write
+
+USAGE_CACHE_FILE = "disk_usage_cache.json"  # next to the executable
+DEFAULT_WORKERS = 8  # directories listed at once, the share answers them in parallel
+
+# Disk usage and last activity of every category and project.
+# projects are walked in parallel with os.scandir, every directory is cached with its mtime and own totals
+# (size, file count, newest modification of the files directly inside it, names of its sub folders).
+# a directory whose mtime has not changed is not listed again, only stat'ed, so a repeat scan costs one stat
+# per unchanged folder. adding, removing or renaming a file changes the folder's mtime,
+# a file rewritten in place does not: use a full rescan to pick those up.
+
+
+class UsageStats:
+    """size, file count and last activity (newest mtime) of a folder tree."""
+    def __init__(self, size=0, files=0, latest=0.0):
+        self.size:int = size
+        self.files:int = files
+        self.latest:float = latest
+
+    def add(self, other):
+        self.size += other.size
+        self.files += other.files
+        self.latest = max(self.latest, other.latest)
+
+
+class CategoryUsage:
+    """totals of a category: its own loose files plus its projects."""
+    def __init__(self):
+        self.total = UsageStats()
+        self.projects:dict = {}  # project name -> UsageStats
+
+    def add(self, project, stats):
+        """:param project: project name, None for the files directly in the category folder"""
+        if project is not None:
+            self.projects[project] = stats
+        self.total.add(stats)
+
+
+def visit(path, mtime, cache, full=False):
+    """
+    the own totals of a single directory, listed only if its mtime differs from the cached one.
+    :return: (cache entry [mtime, size, files, latest, sub folder names], list of (sub folder path, mtime or None))
+    """
+    cached = None if full else cache.get(path)
+    if cached is not None and cached[0] == mtime:
+        return cached, [(os.path.join(path, name), None) for name in cached[4]]
+    size = files = 0
+    latest = mtime  # a file added or removed counts as activity
+    subfolders = []
+    with os.scandir(path) as entries:
+        for entry in entries:
+            try:
+                stat = entry.stat(follow_symlinks=False)  # free on Windows, scandir already has it
+                if entry.is_dir(follow_symlinks=False):
+                    subfolders.append((entry.path, stat.st_mtime))
+                    continue
+            except OSError:
+                continue  # removed while listing
+            size += stat.st_size
+            files += 1
+            latest = max(latest, stat.st_mtime)
+    return [mtime, size, files, latest, [os.path.basename(sub_path) for sub_path, _ in subfolders]], subfolders
+
+
+def walk_tree(path, mtime, cache, full=False):
+    """
+    totals of a folder tree, unchanged sub folders come from the cache.
+    :return: (UsageStats, dict of visited path -> cache entry)
+    """
+    stats = UsageStats()
+    visited = {}
+    folders = [(path, mtime)]
+    while folders:
+        folder, folder_mtime = folders.pop()
+        try:
+            if folder_mtime is None:
+                folder_mtime = os.stat(folder).st_mtime
+            entry, subfolders = visit(folder, folder_mtime, cache, full)
+        except OSError:
+            continue  # removed since the last scan, or no access
+        visited[folder] = entry
+        stats.add(UsageStats(entry[1], entry[2], entry[3]))
+        folders.extend(subfolders)
+    return stats, visited
+
+
+class DiskUsage:
+    """
+    Disk usage of the main directory, per category and project, with a cache file keyed by directory mtime.
+    scan touches the share and is meant to run in a background thread.
+    """
+    def __init__(self, main_folder, cache_file=None):
+        self.main_folder:str = main_folder
+        self.cache_file:str = cache_file or app_file(USAGE_CACHE_FILE)
+        self.cache:dict = {}  # directory path -> [mtime, size, files, latest, sub folder names]
+
+    def load_cache(self):
+        """loads the cache file, ignores a cache of another main folder."""
+        try:
+            with open(self.cache_file, "r", encoding="utf-8") as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if not isinstance(cache, dict) or cache.get("main_folder") != self.main_folder:
+            return False
+        self.cache = dict(cache.get("folders", {}))
+        return True
+
+    def save_cache(self):
+        try:
+            atomic_write(self.cache_file, lambda f: json.dump({"main_folder": self.main_folder, "folders": self.cache},
+                                                              f, ensure_ascii=False), ".disk-usage-")
+        except OSError:
+            pass  # the cache is only a speedup
+
+    def scan(self, on_result=None, full=False, workers=DEFAULT_WORKERS):
+        """
+        lists the categories, then walks their projects in a thread pool.
+        :param on_result: called with (category, project name or None, UsageStats) as soon as a project is done,
+                          from the scanning thread. None is the category's own loose files.
+        :param full: ignore the cache and list every folder again
+        :return: dict of category name -> CategoryUsage
+        """
+        if not self.cache:
+            self.load_cache()
+        cache = self.cache
+        visited = {}
+        results = {}
+
+        def report(category, project, stats):
+            results[category].add(project, stats)
+            if on_result is not None:
+                on_result(category, project, stats)
+
+        with span("usage.scan"), ThreadPoolExecutor(max_workers=workers) as pool:
+            categories = scan_categories(self.main_folder)
+
+            def visit_category(path):
+                mtime = os.stat(path).st_mtime
+                return visit(path, mtime, cache, full)
+
+            projects = []
+            category_futures = {pool.submit(visit_category, path): category for category, path in categories.items()}
+            for future in as_completed(category_futures):
+                category = category_futures[future]
+                results[category] = CategoryUsage()
+                try:
+                    entry, subfolders = future.result()
+                except OSError:
+                    continue
+                visited[categories[category]] = entry
+                report(category, None, UsageStats(entry[1], entry[2], entry[3]))
+                projects.extend((category, path, mtime) for path, mtime in subfolders)
+
+            project_futures = {pool.submit(walk_tree, path, mtime, cache, full): (category, os.path.basename(path))
+                               for category, path, mtime in projects}
+            for future in as_completed(project_futures):
+                category, project = project_futures[future]
+                stats, project_visited = future.result()
+                visited.update(project_visited)
+                report(category, project, stats)
+
+        self.cache = visited  # folders that are gone drop out of the cache
+        self.save_cache()
+        return results
+
+
+def format_size(size):
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} TB"
+
+
+def format_activity(latest):
+    return time.strftime("%Y-%m-%d", time.localtime(latest)) if latest else "-"
@@ -0,0 +1,305 @@
+import os
+import shutil
+import sys
+import tempfile
+import time
+from profiling import span
+from templates import DATE_FORMAT, INVALID_CHARACTERS
+
+UNCATEGORIZED_FOLDER = "חסר קטגוריה"  # projects without a category are stored here
+STAGING_FOLDER = ".scfh-staging"  # hidden folder in the main folder, staged projects are built here
+STALE_STAGING_SECONDS = 60 * 60  # staging folders older than this were left by a crash, not by a running app
+
+
+class FolderPlan:
+    """
+    A deduplicated folder tree of a single project.
+    Does not touch the filesystem, so it can be built and tested without Tk or a real share.
+    nodes are kept parent first, which lets the executor create every folder with a single mkdir
+    instead of letting makedirs walk and stat the parent chain again for each folder.
+    """
+    def __init__(self, project_path, main_folder=None):
+        self.project_path:str = project_path
+        self.main_folder = main_folder  # needed for staged creation, see execute_staged
+        self.nodes:list = []  # folders to create, parents always come before their children
+        self._seen:set = set()  # normalized paths, so "Mode" and "mode" are one folder on Windows
+
+    def add(self, path):
+        """adds a folder to the plan, ignores folders that are already planned."""
+        key = os.path.normcase(os.path.normpath(path))
+        if key not in self._seen:
+            self._seen.add(key)
+            self.nodes.append(path)
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def __iter__(self):
+        return iter(self.nodes)
+
+
+class CreationReport:
+    """
+    Result of executing a FolderPlan: which folders were created and which already existed.
+    created is also the journal used to roll back a cancelled or failed run, it only ever holds
+    folders that this run has actually created.
+    """
+    def __init__(self, project_path):
+        self.project_path:str = project_path
+        self.created:list = []
+        self.existed:list = []
+
+
+class InvalidNameError(ValueError):
+    """raised when a project, mode or (batch manifest) category name is not a single valid folder name."""
+
+
+class ProjectExistsError(FileExistsError):
+    """raised by staged creation when the project folder already exists, nothing is merged into it."""
+
+
+class CreationCancelled(Exception):
+    """raised by execute_plan when the cancel event is set."""
+
+
+class CreationFailed(Exception):
+    """
+    raised by create_project after a cancelled or failed run has been rolled back.
+    reason: the original exception, removed: folders that were rolled back,
+    leftovers: folders that could not be removed (someone already put files in them).
+    """
+    def __init__(self, reason, removed, leftovers):
+        super().__init__(str(reason))
+        self.reason = reason
+        self.removed:list = removed
+        self.leftovers:list = leftovers
+        self.cancelled:bool = isinstance(reason, CreationCancelled)
+
+
+def default_project_name():
+    """the project name used when no name has been given: local date and time."""
+    return time.strftime("%Y-%m-%d %H-%M-%S", time.localtime())
+
+
+def check_folder_name(kind, name):
+    """
+    a project, mode or category name becomes a single folder: no path separators, no '.' or '..',
+    and no characters Windows does not allow in folder names.
+    :raises InvalidNameError: tells which name is invalid
+    """
+    if "/" in name or "\\" in name or name.strip() in (".", "..") or INVALID_CHARACTERS.search(name):
+        raise InvalidNameError(f"invalid {kind} name '{name}': "
+                               f"names can not be '.' or '..' or contain / \\ < > : \" | ? *")
+
+
+def plan_project(main_folder, category_path, project_name, modes_list, template):
+    """
+    Turns the user's choices into a FolderPlan.
+    :param main_folder: the main directory (Iron Swords War).
+    :param category_path: path of the chosen category, "" if no category has been chosen.
+    :param project_name: the project name, "" to name the project by the local date and time.
+    :param modes_list: mode names, duplicates and blank names are ignored.
+    :param template: templates.FolderTemplate, the folders inside the project.
+    :return: FolderPlan
+    :raises InvalidNameError: the project name or a mode name would not be a single folder
+    """
+    if project_name == "":
+        project_name = default_project_name()
+    check_folder_name("project", project_name)
+    plan_nodes = []
+    if category_path == "":
+        category_path = os.path.join(main_folder, UNCATEGORIZED_FOLDER)
+        plan_nodes.append(category_path)  # uncategorized folder may not exist yet
+    project_path = str(os.path.join(category_path, project_name))
+
+    plan = FolderPlan(project_path, main_folder)
+    for node in plan_nodes:
+        plan.add(node)
+    plan.add(project_path)
+
+    modes = [mode for mode in modes_list if mode.strip()]
+    for mode in modes:
+        check_folder_name("mode", mode)
+    date = time.strftime(DATE_FORMAT, time.localtime())
+    with span("folders.plan"):
+        for folders in template.expand(project_name, modes, date):
+            plan.add(os.path.join(project_path, *folders))
+    return plan
+
+
+def execute_plan(plan, progress=None, cancel_event=None, report=None):
+    """
+    Creates every folder of the plan exactly once, parents first.
+    Each folder costs one mkdir, a folder that already exists costs one more stat to make sure it is a directory.
+    Only the project folder falls back to makedirs if its parent (the category folder) is missing.
+    :param plan: FolderPlan
+    :param progress: called with the number of handled folders after each folder
+    :param cancel_event: threading.Event, checked before each folder, raises CreationCancelled when set
+    :param report: CreationReport to fill, pass one in to keep the journal if this raises
+    :return: CreationReport
+    """
+    if report is None:
+        report = CreationReport(plan.project_path)
+    planned = set(plan.nodes)
+    for done, node in enumerate(plan.nodes):
+        if cancel_event is not None and cancel_event.is_set():
+            raise CreationCancelled("folder creation has been cancelled")
+        if progress is not None:
+            progress(done)
+        try:
+            os.mkdir(node)
+        except FileExistsError:
+            if not os.path.isdir(node):
+                raise  # a file with the same name is in the way
+            report.existed.append(node)
+            continue
+        except FileNotFoundError:
+            parent = os.path.dirname(node)
+            if parent in planned or node != plan.project_path:
+                raise
+            report.created.extend(missing_parents(parent))
+            os.makedirs(parent, exist_ok=True)  # category folder is missing, should not happen normally
+            os.mkdir(node)
+        report.created.append(node)
+    if progress is not None:
+        progress(len(plan.nodes))
+    return report
+
+
+def missing_parents(path):
+    """the folders makedirs will create for path, top most first, so they can be journaled."""
+    missing = []
+    while path and not os.path.isdir(path):
+        missing.append(path)
+        parent = os.path.dirname(path)
+        if parent == path:
+            break
+        path = parent
+    return missing[::-1]
+
+
+def rollback(report):
+    """
+    Removes the folders created by a run, children before parents.
+    os.rmdir never removes a folder with files in it, so nothing but our own empty folders can be lost.
+    :param report: CreationReport of the run
+    :return: (removed folders, folders that could not be removed)
+    """
+    removed = []
+    leftovers = []
+    for folder in reversed(report.created):
+        try:
+            os.rmdir(folder)
+        except FileNotFoundError:
+            continue
+        except OSError:
+            leftovers.append(folder)
+            continue
+        removed.append(folder)
+    return removed, leftovers
+
+
+def is_inside(path, folder):
+    return path == folder or path.startswith(folder.rstrip("\\/") + os.sep)
+
+
+def hide_folder(path):
+    """marks a folder hidden on Windows, the leading dot already hides it elsewhere."""
+    if sys.platform == "win32":
+        import ctypes
+        ctypes.windll.kernel32.SetFileAttributesW(str(path), 0x2)  # FILE_ATTRIBUTE_HIDDEN
+
+
+def staging_root(main_folder):
+    """the hidden staging folder, on the same volume as the categories so publishing is a single rename."""
+    root_path = os.path.join(main_folder, STAGING_FOLDER)
+    try:
+        os.mkdir(root_path)
+    except FileExistsError:
+        return root_path
+    hide_folder(root_path)
+    return root_path
+
+
+def execute_staged(plan, progress=None, cancel_event=None, report=None):
+    """
+    Builds the project tree in a hidden staging folder, then publishes it with a single rename,
+    so nobody browsing the share ever sees a half built project.
+    folders outside the project (the uncategorized folder) are created in place first.
+    :raises ProjectExistsError: the project folder already exists, it is never merged into
+    :return: CreationReport, created lists the published folders
+    """
+    if report is None:
+        report = CreationReport(plan.project_path)
+    project_path = plan.project_path
+    outside = FolderPlan(project_path)
+    inside = []
+    for node in plan.nodes:
+        if is_inside(node, project_path):
+            inside.append(node)
+        else:
+            outside.add(node)
+    execute_plan(outside, cancel_event=cancel_event, report=report)
+    if os.path.lexists(project_path):
+        raise ProjectExistsError(f"a project with this name already exists: {project_path}")
+
+    staging_folder = tempfile.mkdtemp(prefix=time.strftime("%Y%m%d-%H%M%S-"), dir=staging_root(plan.main_folder))
+    try:
+        staged_project = os.path.join(staging_folder, os.path.basename(project_path))
+        staged = FolderPlan(staged_project)
+        for node in inside:
+            staged.add(staged_project + node[len(project_path):])
+        offset = len(outside)
+        staged_progress = (lambda done: progress(offset + done)) if progress is not None else None
+        execute_plan(staged, staged_progress, cancel_event)
+
+        if cancel_event is not None and cancel_event.is_set():
+            raise CreationCancelled("folder creation has been cancelled")
+        if os.path.lexists(project_path):  # created by someone else while we were building
+            raise ProjectExistsError(f"a project with this name already exists: {project_path}")
+        try:
+            os.rename(staged_project, project_path)  # the publish, one operation on the share
+        except FileExistsError as error:
+            raise ProjectExistsError(f"a project with this name already exists: {project_path}") from error
+        report.created.extend(inside)
+    finally:
+        shutil.rmtree(staging_folder, ignore_errors=True)  # empty after a publish, the whole attempt otherwise
+    return report
+
+
+def cleanup_stale_staging(main_folder, max_age=STALE_STAGING_SECONDS):
+    """
+    removes staging folders left behind by a crash, runs when the app starts.
+    younger staging folders may belong to a colleague creating a project right now, they are kept.
+    :return: number of removed staging folders
+    """
+    removed = 0
+    now = time.time()
+    try:
+        with os.scandir(os.path.join(main_folder, STAGING_FOLDER)) as entries:
+            stale = [entry.path for entry in entries
+                     if entry.is_dir() and now - entry.stat().st_mtime > max_age]
+    except OSError:
+        return 0  # nothing has ever been staged here
+    for path in stale:
+        shutil.rmtree(path, ignore_errors=True)
+        removed += 1
+    return removed
+
+
+def create_project(plan, progress=None, cancel_event=None, staged=False):
+    """
+    Executes the plan, rolls back everything it has created if it is cancelled or fails.
+    :param staged: build in a hidden staging folder and publish with a single rename (see execute_staged),
+    fails if the project already exists instead of adding to it.
+    :return: CreationReport
+    :raises CreationFailed: after the rollback
+    """
+    report = CreationReport(plan.project_path)
+    execute = execute_staged if staged else execute_plan
+    try:
+        with span("folders.create"):
+            return execute(plan, progress, cancel_event, report)
+    except (CreationCancelled, OSError) as error:
+        removed, leftovers = rollback(report)
+        raise CreationFailed(error, removed, leftovers) from error
@@ -1,9 +1,24 @@
-from tkinter import filedialog
 import customtkinter as ctk
 import os
+import queue
+import sys
+import threading
 import time
-
-root = ctk.CTk()  # creates a ctk root of the whole app
+from archive import archive_project, list_project_folders, restore_project
+from categories import CategoryIndex, CategorySearch
+from disk_usage import CategoryUsage, DiskUsage, UsageStats, format_activity, format_size
+from folder_plan import plan_project, create_project, cleanup_stale_staging, CreationFailed, InvalidNameError
+from ingest import default_rules_text, parse_rules, plan_ingest, run_ingest, RuleError
+from modes import ModeList, parse_modes_text, read_modes_file
+from profiling import span, record
+from project_index import ArchiveRecord, ProjectIndex, find_modes
+from recategorize import list_uncategorized, move_projects, plan_moves, undo_last_batch
+from settings import app_file, get_settings
+from templates import DEFAULT_TEMPLATE_NAME, load_templates
+
+root = None  # the ctk root of the whole app, created in app_initialization, not on import
+STARTUP_TARGET_SECONDS = 1.0  # from the start of main.py until the welcome screen is painted
+STARTUP_TIME_FILE = "startup_time.txt"  # next to the executable, the last reported startup time
 
 
 class Tabs(ctk.CTkTabview):
@@ -19,14 +34,28 @@ class Tabs(ctk.CTkTabview):
     def __init__(self, master, **kwargs):
         super().__init__(master, **kwargs)
         self.master = master
-        self.main_folder = load_default_path()
-        self.project_name = None
+        self.settings = get_settings()  # shared by all components
+        self.main_folder = self.settings.get("main_folder")
+        self.project_name_entry = None  # the project name entry, read when Create is pressed
         self.modes_list:list = []
         self.inside_cat_path:str = ""
-        self.inner_switch = None
+        self.template_menu = None
+        self.templates, self.template_errors = load_templates()  # compiled once, see templates.py
+        self.project_index = ProjectIndex(self.main_folder)  # warns about duplicate project names
+        self.duplicate_label = None
+        self.reopen_button = None
+        self.duplicate_project = None  # the existing project that can be reopened
+        self.reopened_path = None  # a reopened project is added to in place, never staged
+        self.settings.subscribe("main_folder", self.on_main_folder_changed)
         self.category_instance = None
-
-        self.tab_widget = ctk.CTkTabview(master)  # create tabs widget
+        self.confirm_button = None
+        self.mode_logic = None
+        self.stats_logic = None
+        self.sort_logic = None
+        self.archive_logic = None
+        self.built_tabs:set = set()  # tabs are built on first selection, see show_tab
+
+        self.tab_widget = ctk.CTkTabview(master, command=lambda: self.build_tab(self.tab_widget.get()))  # create tabs widget
         self.tab_widget.pack(fill="both", expand=True)
 
         self.create_tabs() # creates the tabs
@@ -34,10 +63,20 @@ class Tabs(ctk.CTkTabview):
     def create_tabs(self):
         """
         handles creation and configuration of tabs.
+        only the Main tab is built here, the other tabs are built when they are selected for the first time,
+        so the window shows up without waiting for widgets the user has not asked for yet.
         """
+        with span("tabs.create"):
+            self.create_tab_buttons()
+        self.build_tab("Main")
+
+    def create_tab_buttons(self):
         self.tab_widget.add("Main")
         self.tab_widget.add("Configure")
         self.tab_widget.add("Modes")
+        self.tab_widget.add("Stats")
+        self.tab_widget.add("Sort")
+        self.tab_widget.add("Archive")
 
         for button in self.tab_widget._segmented_button._buttons_dict.values():
             """
@@ -46,9 +85,24 @@ class Tabs(ctk.CTkTabview):
             """
             button.configure(font=("Arial", 18))  # Change font size here
 
-        self.main_tab(self.tab_widget.tab("Main")) # run main tab logic
-        self.config_tab(self.tab_widget.tab("Configure"))  # run config tab logic
-        self.modes_config(self.tab_widget.tab("Modes"))  # run modes tab logic
+    def build_tab(self, name):
+        """runs the tab logic of the given tab, only the first time it is called for that tab."""
+        if name in self.built_tabs:
+            return
+        self.built_tabs.add(name)
+        tab_builders = {"Main": self.main_tab,  # run main tab logic
+                        "Configure": self.config_tab,  # run config tab logic
+                        "Modes": self.modes_config,  # run modes tab logic
+                        "Stats": self.stats_tab,  # run stats tab logic
+                        "Sort": self.sort_tab,  # run sort tab logic
+                        "Archive": self.archive_tab}  # run archive tab logic
+        with span(f"tabs.build.{name}"):
+            tab_builders[name](self.tab_widget.tab(name))
+
+    def show_tab(self, name):
+        """moves to a tab, builds it first if needed (tab_widget.set does not run the tabs command)."""
+        self.build_tab(name)
+        self.tab_widget.set(name)
 
     def main_tab(self, tab):
         """
@@ -63,21 +117,102 @@ class Tabs(ctk.CTkTabview):
                                           font=("Arial", 22, "bold"))  # project name label
         project_name_label.pack(pady=15) # creates label
 
-        self.project_name = get_project_name(project_creation_frame) # Project name entry
+        self.project_name_entry = get_project_name(project_creation_frame) # Project name entry
+        self.project_name_entry.bind("<KeyRelease>", lambda event: self.check_duplicate_name())
+        self.duplicate_label = ctk.CTkLabel(project_creation_frame, text_color="#ff4249", font=("Arial", 14, "bold"))
+        self.reopen_button = ctk.CTkButton(project_creation_frame, text="Reopen and add modes",
+                                           font=("Arial", 14, "bold"), command=self.reopen_project)
+        # the last index is loaded right away, changed categories are re-scanned in the background
+        self.project_index.load()
+        run_in_background(project_creation_frame, self.project_index.update)
+        run_in_background(project_creation_frame, lambda: cleanup_stale_staging(self.main_folder))
 
         self.category_instance = CategoriesLogic(frame=project_creation_frame)
 
         # upon Pressing on the Confirm button, you will be sent to the modes tab.
         move_to_modes_tab_button = ctk.CTkButton(project_creation_frame,
                                                  text="Confirm", width=250, height=100,
-                                                 command= lambda: (self.tab_widget.set("Modes"), no_category_popup(self.tab_widget) if self.category_instance.cat_path == "" else None),
+                                                 command= lambda: (self.show_tab("Modes"), no_category_popup(self.tab_widget) if self.category_instance.cat_path == "" else None),
                                                  font=("Arial", 22, "bold"))
         move_to_modes_tab_button.pack(pady=15, side="bottom")
 
+    def on_main_folder_changed(self, main_folder):
+        """the main directory has been changed in the Configure tab, projects are looked up in the new one."""
+        self.main_folder = main_folder
+        self.project_index = ProjectIndex(main_folder)
+        self.project_index.load()
+        run_in_background(self.master, self.project_index.update)
+        run_in_background(self.master, lambda: cleanup_stale_staging(main_folder))
+        self.check_duplicate_name()
+
+    def check_duplicate_name(self):
+        """
+        runs on every key press in the project name entry,
+        warns if a project with the same name already exists in any category (see project_index.py).
+        """
+        matches = self.project_index.find(self.project_name_entry.get())
+        if not matches:
+            self.duplicate_project = None
+            self.reopen_button.pack_forget()
+            archived = self.project_index.find_archived(self.project_name_entry.get())
+            if not archived:
+                self.duplicate_label.pack_forget()
+                return
+            categories = ", ".join(record.category for record in archived)
+            self.duplicate_label.configure(text=f"This project is archived in: {categories} (restore it in Archive)")
+            self.duplicate_label.pack(after=self.project_name_entry, pady=2)
+            return
+        self.duplicate_project = matches[0]
+        categories = ", ".join(project.category for project in matches)
+        self.duplicate_label.configure(text=f"This project already exists in: {categories}")
+        self.duplicate_label.pack(after=self.project_name_entry, pady=2)
+        self.reopen_button.pack(after=self.duplicate_label, pady=2)
+
+    def reopen_project(self):
+        """
+        reopens the existing project: chooses its category and moves to the Modes tab with its modes,
+        new modes are added to it, existing folders are kept as they are.
+        """
+        project = self.duplicate_project
+        if project is None:
+            return
+
+        def on_done(project):
+            self.project_name_entry.delete(0, ctk.END)
+            self.project_name_entry.insert(0, project.name)
+            self.check_duplicate_name()
+            self.category_instance.choose_category(project.category, project.category_path)
+            self.reopened_path = project.path
+            self.show_tab("Modes")
+            self.mode_logic.add_modes(project.modes)
+
+        run_in_background(self.master, lambda: self.project_index.refresh_project(project),
+                          on_done=on_done, on_error=lambda error: on_done(project))  # modes from the index
+
+    def reset_for_next_project(self):
+        """
+        "Create another" - resets only the name, category and modes of the last project.
+        the window, the loaded categories and project index, the settings and the template are kept,
+        so the next project does not pay for a relaunch. categories and projects are refreshed incrementally
+        (only re-scanned if the main folder or a category has changed).
+        """
+        self.project_name_entry.delete(0, ctk.END)
+        self.duplicate_project = None
+        self.reopened_path = None
+        self.check_duplicate_name()
+        self.category_instance.reset()
+        if self.mode_logic is not None:
+            self.mode_logic.reset()
+        if self.confirm_button is not None:
+            self.confirm_button.configure(state="normal")
+        run_in_background(self.master, self.project_index.update)
+        self.show_tab("Main")
+        self.project_name_entry.focus_set()
+
     def config_tab(self, tab_frame):
         """
         creates a frame to manage main directory.
-        adds a switch to toggle Recordings and Pictures folders creation inside the project folder.
+        adds a menu to choose the folder template of the project folder (Recordings and Pictures by default).
         added for customizability in the future.
 
         things to add here:
@@ -100,127 +235,614 @@ class Tabs(ctk.CTkTabview):
                                                 command=lambda: change_directory_popup(self.main_folder, directory_label))
         choose_directory_button.pack(pady=10, side="bottom")  # creates a button to change directory
 
-        self.inner_switch = inner_folders_switch_state(path_frame)
+        self.template_menu = folder_template_menu(path_frame, list(self.templates), self.template_errors)
+        staged_creation_switch(path_frame, self.settings)
+
+    def stats_tab(self, tab_frame):
+        """shows the disk usage and last activity of the categories and projects, scanned when first opened."""
+        self.stats_logic = StatsLogic(tab_frame)
+        self.stats_logic.scan()
+
+    def sort_tab(self, tab_frame):
+        """moves uncategorized projects into categories, the project index is updated after every move."""
+        self.sort_logic = SortLogic(tab_frame, on_moved=lambda: run_in_background(self.master, self.project_index.update))
+        self.sort_logic.refresh()
+
+    def archive_tab(self, tab_frame):
+        """archives finished projects and restores them, archived projects stay in the project index."""
+        self.archive_logic = ArchiveLogic(tab_frame, get_index=lambda: self.project_index)
 
     def modes_config(self, tab):
         """uses a class AddModeLogic, in the end, stores a mode list in a variable.
 
         uses the custom class to add a button that
         adds entries and a modes tracker"""
-        mode_logic = AddModeLogic(tab)
-        self.modes_list = mode_logic.get_list()
+        self.mode_logic = AddModeLogic(tab)
 
-        confirm_button = ctk.CTkButton(tab, text="Create",
+        self.confirm_button = ctk.CTkButton(tab, text="Create",
                                        width=250, height=100,
                                        command=lambda: self.folder_creation_handler(),  # see folder_creation_handler
                                        font=("Arial", 22, "bold"), )
-        confirm_button.pack(pady=15)
+        self.confirm_button.pack(pady=15)
 
     def folder_creation_handler(self):
         """
             Creates a folder structure based on the provided parameters.
+            The tree itself is planned and created by folder_plan, see plan_project and execute_plan.
 
             Parameters:
             - main_dir : The main directory where the project will be created.
             - category_path : Path inside the category.
             - project_name : The project name.
             - modes_list : A list of mode names.
-            - inner_switch: If True, create "Recordings" and "Pictures" folders and add mode folders in them.
+            - template : The folder template chosen in the Configure tab, see templates.py.
+
+            The folders are created in a worker thread with a progress popup that can cancel the run,
+            a cancelled or failed run is rolled back (see folder_plan.create_project).
 
             Shows popup when done.
             """
-        self.project_name = self.project_name.get()
-        category_path = self.category_instance.cat_path
-        if self.project_name == "":
-            self.project_name = time.strftime("%Y-%m-%d %H-%M-%S", time.localtime())
-        if category_path == "":
-            uncategorized = os.path.join(self.main_folder, "חסר קטגוריה")
-            os.makedirs(uncategorized, exist_ok=True) # in case no category were chosen, create uncategorized directory and store the project there
-            category_path = uncategorized
-        project_path = str(os.path.join(category_path, self.project_name)) # Define the project path
-        os.makedirs(project_path, exist_ok=True) # Create the project folder
-            # If the switch is True, create "Recordings" and "Pictures" folders and mode subfolders
-        if self.inner_switch.get():
-            for subfolder in ['Recordings', 'Pictures']:
-                subfolder_path = os.path.join(project_path, subfolder)
-                os.makedirs(subfolder_path, exist_ok=True)
-                # Create mode subfolders inside "Recordings" and "Pictures"
-                for mode in self.modes_list:
-                    mode_folder_path = os.path.join(subfolder_path, mode)
-                    os.makedirs(mode_folder_path, exist_ok=True)
-
-        else: # Only create modes folders inside project folder.
-            for mode in self.modes_list:
-                mode_folder_path = os.path.join(project_path, mode)
-                os.makedirs(mode_folder_path, exist_ok=True)
-        show_project_creation_popup(project_path)
+        project_name = self.project_name_entry.get()  # the entry is kept for the next project and for retries
+        self.modes_list = self.mode_logic.get_list()
+        # Recordings and Pictures by default, the Configure tab may have never been opened
+        template_name = self.template_menu.get() if self.template_menu is not None else DEFAULT_TEMPLATE_NAME
+        try:
+            plan = plan_project(self.main_folder, self.category_instance.cat_path, project_name,
+                                self.modes_list, self.templates[template_name])
+        except InvalidNameError as error:  # e.g. a '/' in a mode name, nothing has been created
+            creation_failed_popup(error)
+            return
+
+        # staged: built in a hidden folder and published at once, a reopened project is added to in place
+        staged = self.settings.get("staged_creation") and plan.project_path != self.reopened_path
+        cancel_event = threading.Event()
+        progress_popup, progress_bar, progress_label = creation_progress_popup(cancel_event)
+        self.confirm_button.configure(state="disabled")  # one run at a time
+
+        def on_progress(done):
+            progress_bar.set(done / len(plan))
+            progress_label.configure(text=f"{done} of {len(plan)} folders")
+
+        def on_done(report):
+            progress_popup.destroy()
+            # the run is over, however the success popup is closed another project can be created
+            self.confirm_button.configure(state="normal")
+            self.project_index.add_project(report.project_path, self.modes_list)
+            show_project_creation_popup(report.project_path, on_create_another=self.reset_for_next_project)
+
+        def on_error(error):
+            progress_popup.destroy()
+            self.confirm_button.configure(state="normal")
+            creation_failed_popup(error)
+
+        run_in_background(self.master,
+                          lambda report_progress: create_project(plan, report_progress, cancel_event, staged),
+                          on_done=on_done, on_error=on_error, on_progress=on_progress)
 
 class CategoriesLogic:
-    def __init__(self, frame):
+    def __init__(self, frame, on_choose=None):
         self.frame = frame
-        self.main_folder:str = load_default_path()
+        self.on_choose = on_choose  # called with the category path when a category is clicked
+        self.main_folder:str = get_settings().get("main_folder")
         self.cat_list:list = []
         self.cat_dict:dict = {}
         self.cat_path:str = ""  # this is what I need in the end
-        self.scrl_frame = None
+        self.category_label = None
+        self.search_entry = None
+        self.category_list = None
+        self.index = CategoryIndex(self.main_folder)
+        self.search = CategorySearch([])
 
         self.get_categories()
-        self.scrl_frame = self.scrollable_frame_creation()
-        self.segmented_buttons()
+        self.category_picker()
+        self.refresh_categories()  # the fresh listing replaces the cached one when it arrives
+        get_settings().subscribe("main_folder", self.on_main_folder_changed)
 
-    def scrollable_frame_creation(self):
-        scrollable_frame = ctk.CTkScrollableFrame(self.frame, height=150,
-                                                             orientation="horizontal", label_text="Choose Category:",
-                                                             label_font=("Arial", 16, "bold"))
-        scrollable_frame.pack(pady=10, fill="both")
-        # creates a scrollable frame that will store the categories as segmented buttons
-        return scrollable_frame
+    def category_picker(self):
+        """
+        creates a search entry and a virtual list of the categories,
+        typing in the entry filters the list, clicking a category chooses it.
+        """
+        self.category_label = ctk.CTkLabel(self.frame, text="Choose Category:", font=("Arial", 16, "bold"))
+        self.category_label.pack(pady=(10, 0))
+        self.search_entry = ctk.CTkEntry(self.frame, width=300, placeholder_text="Search category...")
+        self.search_entry.pack(pady=5)
+        self.search_entry.bind("<KeyRelease>", lambda event: self.filter_categories())
+        self.category_list = VirtualList(self.frame, on_select=lambda value: self.get_inside_category_path(value, self.cat_dict))
+        self.category_list.set_items(self.cat_list)
+
+    def filter_categories(self):
+        self.category_list.set_items(self.search.search(self.search_entry.get()))
 
     def get_categories(self):
         """
-                    makes a list out of the folders in the main directory,
-                    then it assigns to a dictionary the key as the category name and
-                    the value as its path (inside the category folder)
-
-                    returns a dict.
-                    key: category name.
-                    value: path inside corresponding category.
+                    loads the categories of the last scan from the cache (see categories.CategoryIndex),
+                    so the tab paints immediately even if the main directory is slow or unreachable.
+                    the key is the category name and the value is its path (inside the category folder)
+                    the search index is rebuilt once per scan, not per key press.
                     """
-        self.cat_list = os.listdir(self.main_folder)  # makes a list out of the folders in default path.
-        for i in range(len(self.cat_list)):  # makes dictionary,the key is the category and the value is the path
-            self.cat_dict[self.cat_list[i]] = os.path.join(self.main_folder,
-                                                             self.cat_list[i])  # joins the main path with the
-            # category name to form a category path.
-
-    def segmented_buttons(self):
-        seg_buttons = ctk.CTkSegmentedButton(self.scrl_frame,
-                                                 width=500,
-                                             height=150,
-                                             font=("Arial", 22),
-                                             dynamic_resizing=True,
-                                             border_width=10,
-                                             corner_radius=10,
-                                             values=self.cat_list,
-                                             fg_color="#2B2B2B",
-                                             command=lambda value: self.get_inside_category_path(value,self.cat_dict))
-        seg_buttons.pack(padx=5)  # creates a segmented buttons to choose a category from the main directory.
+        with span("categories.load_cache"):
+            self.index.load_cache()
+        self.cat_dict = self.index.cat_dict
+        self.cat_list = list(self.cat_dict)
+        self.search = CategorySearch(self.cat_list)
+
+    def refresh_categories(self):
+        """re-scans the main directory in a background thread, the Tk thread never waits for the share."""
+        run_in_background(self.frame, self.index.refresh,
+                          on_done=self.on_categories_refreshed,
+                          on_error=self.on_categories_error)
+
+    def on_categories_refreshed(self, changed):
+        """runs on the Tk thread, updates the category list if the categories have changed."""
+        self.category_label.configure(text="Choose Category:")
+        if not changed:
+            return
+        self.cat_dict = self.index.cat_dict
+        self.cat_list = list(self.cat_dict)
+        self.search = CategorySearch(self.cat_list)
+        if self.cat_path not in self.cat_dict.values():
+            self.cat_path = ""  # chosen category has been removed
+            self.category_list.selected = None
+        self.filter_categories()
+
+    def on_main_folder_changed(self, main_folder):
+        """re-scans the categories of the new main directory, no restart needed."""
+        self.main_folder = main_folder
+        self.index = CategoryIndex(main_folder)
+        self.cat_path = ""  # the chosen category belongs to the old main directory
+        self.category_list.selected = None
+        self.get_categories()
+        self.filter_categories()
+        self.refresh_categories()
+
+    def on_categories_error(self, error):
+        self.category_label.configure(text="Choose Category: (main folder is unreachable)")
 
     def get_inside_category_path(self, category, dictionary):
         self.cat_path = dictionary[category]
+        if self.on_choose is not None:
+            self.on_choose(self.cat_path)
+
+    def reset(self):
+        """clears the chosen category and the search, refreshes the categories if the main folder has changed."""
+        self.cat_path = ""
+        self.category_list.selected = None
+        self.search_entry.delete(0, ctk.END)
+        self.filter_categories()
+        self.refresh_categories()
+
+    def choose_category(self, category, category_path):
+        """chooses a category without clicking it, used when an existing project is reopened."""
+        self.cat_path = category_path
+        self.category_list.selected = category
+        self.category_list.render()
+
+class StatsLogic:
+    """
+    The Stats tab: size, file count and last activity of every category and of the projects of the chosen one.
+    results are shown as they arrive from the scan (see disk_usage.py), a repeat scan only lists changed folders.
+    """
+    SORT_KEYS = {"Size": lambda stats: -stats.size,
+                 "Files": lambda stats: -stats.files,
+                 "Oldest Activity": lambda stats: stats.latest}  # stale categories and projects first
+
+    def __init__(self, frame):
+        self.frame = frame
+        self.usage = None  # DiskUsage of the current main directory
+        self.results:dict = {}  # category -> CategoryUsage, filled while the scan runs
+        self.pending = queue.Queue()  # (category, project, stats) from the scanning thread
+        self.rows:dict = {}  # row text -> category name
+        self.chosen_category = None
+        self.scanning:bool = False
+        self.scan_started:float = 0.0
+
+        self.status_label = ctk.CTkLabel(frame, text="", font=("Arial", 14, "bold"))
+        self.status_label.pack(pady=(10, 0))
+        buttons_frame = ctk.CTkFrame(frame, fg_color="transparent")
+        buttons_frame.pack(pady=5)
+        ctk.CTkButton(buttons_frame, text="Scan", font=("Arial", 16, "bold"),
+                      command=self.scan).pack(side="left", padx=5)
+        ctk.CTkButton(buttons_frame, text="Full Rescan", font=("Arial", 16, "bold"),
+                      command=lambda: self.scan(full=True)).pack(side="left", padx=5)
+        self.sort_button = ctk.CTkSegmentedButton(frame, values=list(self.SORT_KEYS), font=("Arial", 14),
+                                                  command=lambda value: self.render())
+        self.sort_button.set("Size")
+        self.sort_button.pack(pady=5)
+        self.category_list = VirtualList(frame, on_select=self.choose_category, visible_rows=6, row_height=28,
+                                         font=("Arial", 14))
+        self.projects_label = ctk.CTkLabel(frame, text="Choose a category to see its projects", font=("Arial", 14))
+        self.projects_label.pack()
+        self.project_list = VirtualList(frame, on_select=lambda value: None, visible_rows=5, row_height=28,
+                                        font=("Arial", 14))
+
+    def scan(self, full=False):
+        """scans the main directory in a background thread, full ignores the cache."""
+        if self.scanning:
+            return
+        main_folder = get_settings().get("main_folder")
+        if self.usage is None or self.usage.main_folder != main_folder:
+            self.usage = DiskUsage(main_folder)
+            self.chosen_category = None
+        self.scanning = True
+        self.scan_started = time.perf_counter()
+        self.results = {}
+        self.status_label.configure(text="Scanning...")
+        usage = self.usage
+
+        def work(report_progress):
+            def on_result(category, project, stats):
+                self.pending.put((category, project, stats))
+                report_progress(None)  # only wakes the Tk thread up, the results are in self.pending
+            return usage.scan(on_result, full=full)
+
+        run_in_background(self.frame, work, on_done=self.on_scan_done, on_error=self.on_scan_error,
+                          on_progress=lambda value: self.show_pending(), poll_ms=200)
+
+    def show_pending(self):
+        """adds the results that arrived since the last poll, runs on the Tk thread."""
+        while True:
+            try:
+                category, project, stats = self.pending.get_nowait()
+            except queue.Empty:
+                break
+            self.results.setdefault(category, CategoryUsage()).add(project, stats)
+        self.status_label.configure(text=f"Scanning... {len(self.results)} categories")
+        self.render()
+
+    def on_scan_done(self, results):
+        self.scanning = False
+        self.results = results
+        total = UsageStats()
+        for category_usage in results.values():
+            total.add(category_usage.total)
+        self.status_label.configure(text=f"{len(results)} categories, {format_size(total.size)}, {total.files} files, "
+                                         f"scanned in {time.perf_counter() - self.scan_started:.1f}s")
+        self.render()
+
+    def on_scan_error(self, error):
+        self.scanning = False
+        self.status_label.configure(text=f"Scan failed: {error}")
+
+    def row_text(self, name, stats):
+        return f"{name}  |  {format_size(stats.size)}  |  {stats.files} files  |  {format_activity(stats.latest)}"
+
+    def sorted_rows(self, stats_by_name):
+        key = self.SORT_KEYS[self.sort_button.get()]
+        return [(self.row_text(name, stats), name) for name, stats in sorted(stats_by_name.items(),
+                                                                               key=lambda item: key(item[1]))]
+
+    def render(self):
+        """re-sorts the lists, keeps their scroll position and selection."""
+        rows = self.sorted_rows({name: usage.total for name, usage in self.results.items()})
+        self.rows = {text: name for text, name in rows}
+        self.category_list.items = [text for text, name in rows]
+        self.category_list.selected = next((text for text, name in rows if name == self.chosen_category), None)
+        self.category_list.render()
+        self.show_projects()
+
+    def choose_category(self, row_text):
+        self.chosen_category = self.rows.get(row_text)
+        self.show_projects()
+
+    def show_projects(self):
+        category_usage = self.results.get(self.chosen_category)
+        if category_usage is None:
+            self.project_list.set_items([])
+            return
+        self.projects_label.configure(text=f"Projects of {self.chosen_category}:")
+        self.project_list.items = [text for text, name in self.sorted_rows(category_usage.projects)]
+        self.project_list.render()
+
+
+class SortLogic:
+    """
+    The Sort tab: moves projects out of the uncategorized folder.
+    select any number of uncategorized projects, choose a category and press Move,
+    the projects are renamed into the category in a background thread (see recategorize.py).
+    projects whose name is taken in the category are reported and left in place, Undo moves the last batch back.
+    """
+    def __init__(self, frame, on_moved=None):
+        self.frame = frame
+        self.on_moved = on_moved  # called after projects have been moved, e.g. to update the project index
+        self.projects:dict = {}  # uncategorized project name -> path
+        self.busy:bool = False
+
+        ctk.CTkLabel(frame, text="Uncategorized projects (click to select):",
+                     font=("Arial", 16, "bold")).pack(pady=(10, 0))
+        self.project_list = VirtualList(frame, on_select=lambda selected: self.show_selection(), visible_rows=5,
+                                        row_height=28, font=("Arial", 14), multiple=True)
+        selection_frame = ctk.CTkFrame(frame, fg_color="transparent")
+        selection_frame.pack()
+        ctk.CTkButton(selection_frame, text="Select All", font=("Arial", 14),
+                      command=lambda: self.select(set(self.projects))).pack(side="left", padx=5)
+        ctk.CTkButton(selection_frame, text="Clear", font=("Arial", 14),
+                      command=lambda: self.select(set())).pack(side="left", padx=5)
+        self.category_picker = CategoriesLogic(frame)
+
+        buttons_frame = ctk.CTkFrame(frame, fg_color="transparent")
+        buttons_frame.pack(pady=5)
+        self.move_button = ctk.CTkButton(buttons_frame, text="Move to Category", font=("Arial", 16, "bold"),
+                                         fg_color="green", command=self.move)
+        self.move_button.pack(side="left", padx=5)
+        self.undo_button = ctk.CTkButton(buttons_frame, text="Undo Last Move", font=("Arial", 16, "bold"),
+                                         command=self.undo)
+        self.undo_button.pack(side="left", padx=5)
+        self.status_label = ctk.CTkLabel(frame, text="", font=("Arial", 14, "bold"))
+        self.status_label.pack(pady=5)
+
+    def refresh(self):
+        """lists the uncategorized folder in a background thread."""
+        main_folder = get_settings().get("main_folder")
+        run_in_background(self.frame, lambda: list_uncategorized(main_folder), on_done=self.show_projects,
+                          on_error=lambda error: self.status_label.configure(text=f"Could not list projects: {error}"))
+
+    def show_projects(self, projects):
+        self.projects = projects
+        self.project_list.selected &= set(projects)  # moved or removed projects are no longer selected
+        self.project_list.set_items(list(projects))
+        self.show_selection()
+
+    def select(self, names):
+        self.project_list.selected = names
+        self.project_list.render()
+        self.show_selection()
+
+    def show_selection(self):
+        self.status_label.configure(text=f"{len(self.projects)} uncategorized, "
+                                         f"{len(self.project_list.selected)} selected")
+
+    def set_busy(self, busy):
+        self.busy = busy
+        state = "disabled" if busy else "normal"
+        self.move_button.configure(state=state)
+        self.undo_button.configure(state=state)
+
+    def move(self):
+        if self.busy:
+            return
+        category_path = self.category_picker.cat_path
+        if not self.project_list.selected or not category_path:
+            self.status_label.configure(text="Select projects and a category first")
+            return
+        moves = plan_moves([self.projects[name] for name in sorted(self.project_list.selected)], category_path)
+        self.run(lambda report_progress: move_projects(moves, progress=report_progress), "Moving")
+
+    def undo(self):
+        if not self.busy:
+            self.run(lambda report_progress: undo_last_batch(progress=report_progress), "Undoing")
+
+    def run(self, work, action):
+        self.set_busy(True)
+        self.status_label.configure(text=f"{action}...")
+        run_in_background(self.frame, work, on_done=self.on_done, on_error=self.on_error,
+                          on_progress=lambda value: self.status_label.configure(text=f"{action} {value[0]}/{value[1]}"))
+
+    def on_done(self, report):
+        self.set_busy(False)
+        self.project_list.selected = set()
+        self.status_label.configure(text=f"{len(report.moved)} moved, {len(report.conflicts)} not moved")
+        if report.conflicts:
+            move_conflicts_popup(report.conflicts)
+        self.refresh()
+        if report.moved and self.on_moved is not None:
+            self.on_moved()
+
+    def on_error(self, error):
+        self.set_busy(False)
+        self.status_label.configure(text=f"Move failed: {error}")
+        self.refresh()
+
+
+class ArchiveLogic:
+    """
+    The Archive tab: the projects of a category, archived projects included.
+    Archive packs a project into a single compressed file in its category and removes the folder once the file
+    has been verified, Restore unpacks it again (see archive.py). both run in a background thread.
+    """
+    def __init__(self, frame, get_index):
+        self.frame = frame
+        self.get_index = get_index  # the project index of the current main directory
+        self.rows:dict = {}  # row text -> project name (a folder) or ArchiveRecord
+        self.category_path:str = ""
+        self.busy:bool = False
+
+        self.category_picker = CategoriesLogic(frame, on_choose=self.show_category)
+        self.projects_label = ctk.CTkLabel(frame, text="Choose a category to see its projects",
+                                           font=("Arial", 16, "bold"))
+        self.projects_label.pack(pady=(10, 0))
+        self.project_list = VirtualList(frame, on_select=lambda row: None, visible_rows=5, row_height=28,
+                                        font=("Arial", 14))
+        buttons_frame = ctk.CTkFrame(frame, fg_color="transparent")
+        buttons_frame.pack(pady=5)
+        self.archive_button = ctk.CTkButton(buttons_frame, text="Archive", font=("Arial", 16, "bold"),
+                                            command=self.archive)
+        self.archive_button.pack(side="left", padx=5)
+        self.restore_button = ctk.CTkButton(buttons_frame, text="Restore", font=("Arial", 16, "bold"),
+                                            fg_color="green", command=self.restore)
+        self.restore_button.pack(side="left", padx=5)
+        self.status_label = ctk.CTkLabel(frame, text="", font=("Arial", 14, "bold"))
+        self.status_label.pack(pady=5)
+
+    def show_category(self, category_path):
+        """lists the project folders of the category in a background thread, archived projects come from the index."""
+        self.category_path = category_path
+        self.projects_label.configure(text=f"Projects of {os.path.basename(category_path)}:")
+        run_in_background(self.frame, lambda: list_project_folders(category_path),
+                          on_done=lambda folders: self.show_projects(category_path, folders),
+                          on_error=lambda error: self.status_label.configure(text=f"Could not list projects: {error}"))
+
+    def show_projects(self, category_path, folders):
+        if category_path != self.category_path:
+            return  # another category has been chosen meanwhile
+        rows = {name: name for name in folders}
+        for record in self.get_index().archives(category_path):
+            rows[f"{record.name}  [archived {format_activity(record.archived)}, {format_size(record.size)}]"] = record
+        self.rows = rows
+        self.project_list.selected = None
+        self.project_list.set_items(sorted(rows, key=str.casefold))
+
+    def chosen(self):
+        return self.rows.get(self.project_list.selected)
+
+    def set_busy(self, busy):
+        self.busy = busy
+        state = "disabled" if busy else "normal"
+        self.archive_button.configure(state=state)
+        self.restore_button.configure(state=state)
+
+    def show_progress(self, action, value):
+        done, total = value
+        percent = done * 100 // total if total else 100
+        self.status_label.configure(text=f"{action} {percent}% ({format_size(done)} of {format_size(total)})")
+
+    def archive(self):
+        project = self.chosen()
+        if self.busy or not isinstance(project, str):
+            self.status_label.configure(text="Choose a project folder to archive")
+            return
+        from tkinter import messagebox  # only needed when archiving
+        project_path = os.path.join(self.category_path, project)
+        if not messagebox.askyesno("Archive", f"Archive {project}?\nthe folder is removed once the archive is verified.",
+                                   parent=self.frame):
+            return
+        self.set_busy(True)
+        self.status_label.configure(text=f"Archiving {project}...")
+        index = self.get_index()
+        run_in_background(self.frame,
+                          lambda report_progress: archive_project(project_path, index, progress=report_progress),
+                          on_done=self.on_archived, on_error=self.on_error,
+                          on_progress=lambda value: self.show_progress("Archiving", value), poll_ms=200)
+
+    def on_archived(self, result):
+        record, leftovers = result  # already in the project index
+        self.set_busy(False)
+        text = f"{record.name} archived, {format_size(record.original_size)} -> {format_size(record.size)}"
+        if leftovers:
+            text += f"\n{len(leftovers)} files or folders are in use and were not removed, remove them by hand"
+        self.status_label.configure(text=text)
+        self.show_category(self.category_path)
+
+    def restore(self):
+        record = self.chosen()
+        if self.busy or not isinstance(record, ArchiveRecord):
+            self.status_label.configure(text="Choose an archived project to restore")
+            return
+        self.set_busy(True)
+        self.status_label.configure(text=f"Restoring {record.name}...")
+        run_in_background(self.frame, lambda report_progress: restore_project(record, progress=report_progress),
+                          on_done=lambda project_path: self.on_restored(record), on_error=self.on_error,
+                          on_progress=lambda value: self.show_progress("Restoring", value), poll_ms=200)
+
+    def on_restored(self, record):
+        self.set_busy(False)
+        self.get_index().remove_archive(record)
+        self.status_label.configure(text=f"{record.name} restored")
+        self.show_category(self.category_path)
+
+    def on_error(self, error):
+        self.set_busy(False)
+        self.status_label.configure(text=f"Failed: {error}")
+
+
+class VirtualList:
+    """
+    A vertical list that only creates widgets for the visible rows.
+    a fixed pool of row buttons is reused while scrolling, so hundreds of items
+    cost as much to lay out as a handful.
+    with multiple=True clicking a row toggles it, selected is then a set of items.
+    """
+    def __init__(self, frame, on_select, visible_rows=4, row_height=34, font=("Arial", 18), multiple=False):
+        self.items:list = []
+        self.first:int = 0  # index of the item shown in the top row
+        self.multiple:bool = multiple
+        self.selected = set() if multiple else None
+        self.on_select = on_select
+        self.visible_rows:int = visible_rows
+
+        self.list_frame = ctk.CTkFrame(frame)
+        self.list_frame.pack(pady=5, padx=10, fill="x")
+        self.scrollbar = ctk.CTkScrollbar(self.list_frame, command=self.on_scroll)
+        self.scrollbar.pack(side="right", fill="y")
+
+        self.rows:list = []
+        for row_number in range(visible_rows):
+            row = ctk.CTkButton(self.list_frame, height=row_height, font=font, anchor="w",
+                                fg_color="transparent", text="",
+                                command=lambda row_number=row_number: self.on_row_clicked(row_number))
+            row.pack(fill="x", padx=5, pady=2)
+            row.bind("<MouseWheel>", self.on_mouse_wheel)  # Windows
+            row.bind("<Button-4>", lambda event: self.scroll_to(self.first - 1))  # Linux
+            row.bind("<Button-5>", lambda event: self.scroll_to(self.first + 1))
+            self.rows.append(row)
+
+    def set_items(self, items):
+        """replaces the items, scrolls back to the top."""
+        self.items = list(items)
+        self.first = 0
+        self.render()
+
+    def render(self):
+        """updates the text of the row pool to show items[first:first + visible_rows]."""
+        for row_number, row in enumerate(self.rows):
+            index = self.first + row_number
+            if index < len(self.items):
+                item = self.items[index]
+                highlight = ctk.ThemeManager.theme["CTkButton"]["fg_color"] if self.is_selected(item) else "transparent"
+                row.configure(text=item, state="normal", fg_color=highlight)
+            else:
+                row.configure(text="", state="disabled", fg_color="transparent")
+        if len(self.items) > self.visible_rows:
+            self.scrollbar.set(self.first / len(self.items), (self.first + self.visible_rows) / len(self.items))
+        else:
+            self.scrollbar.set(0, 1)
+
+    def scroll_to(self, first):
+        self.first = max(0, min(first, len(self.items) - self.visible_rows))
+        self.render()
+
+    def on_scroll(self, action, value, unit=None):
+        """scrollbar command: ('moveto', fraction) or ('scroll', amount, 'units'/'pages')."""
+        if action == "moveto":
+            self.scroll_to(int(float(value) * len(self.items)))
+        elif action == "scroll":
+            step = self.visible_rows if unit == "pages" else 1
+            self.scroll_to(self.first + int(float(value)) * step)
+
+    def on_mouse_wheel(self, event):
+        self.scroll_to(self.first - int(event.delta / 120))
+
+    def is_selected(self, item):
+        return item in self.selected if self.multiple else item == self.selected
+
+    def on_row_clicked(self, row_number):
+        index = self.first + row_number
+        if index >= len(self.items):
+            return
+        if self.multiple:
+            self.selected ^= {self.items[index]}
+        else:
+            self.selected = self.items[index]
+        self.render()
+        self.on_select(self.selected)
 
 class AddModeLogic:
     """Creates a class that has its own frame,
     it creates a button that each time you press it, it adds an entry.
     also, it has an entry counter and a self updating label that indicated the number
-    of entries. """
+    of entries.
+    modes can also be pasted or imported from a text file in bulk, the modes are kept in a
+    ModeList (O(1) duplicates check) and shown in a VirtualList, so hundreds of modes
+    are not re-rendered on every addition."""
     def __init__(self, frame):
         """creates a counter
         creates a frame
         creates a button
         creates a label"""
         self.frame = frame
-        self.entries_list = []  # # This holds the list of entries
+        self.entries_list = ModeList()  # # This holds the list of entries
         self.alert_label = None  # Initialize the alert label to make sure only 1 label will show at a time
+        self.selected_mode = None  # mode chosen in the modes list, for removal
 
 
         # Create a Scrollable frame for modes.
@@ -234,10 +856,15 @@ class AddModeLogic:
         self.assign_instruction.pack(pady=5) # creates label
 
         self.add_entry()
+        self.bulk_entry()
 
         # Label to show the entry count
         self.mode_display_label = ctk.CTkLabel(self.modes_frame, text="Modes will be displayed here.", font=("Arial", 16, "bold"))
         self.mode_display_label.pack(pady=5, side="top")
+        self.modes_display = VirtualList(self.modes_frame, on_select=self.on_mode_selected, visible_rows=5, font=("Arial", 16))
+        remove_button = ctk.CTkButton(self.modes_frame, text="Remove Selected Mode", font=("Arial", 16, "bold"),
+                                      command=self.remove_selected_mode)
+        remove_button.pack(pady=5)
 
     def add_entry(self):
         """Adds a new entry field with the number of the mode."""
@@ -247,65 +874,182 @@ class AddModeLogic:
 
         return new_entry
 
+    def bulk_entry(self):
+        """Adds a textbox to paste many modes at once (one per line or comma separated),
+        and a button to import the modes from a text file."""
+        bulk_label = ctk.CTkLabel(self.modes_frame, text="Or paste many modes (new line or comma separated):",
+                                  font=("Arial", 14))
+        bulk_label.pack(pady=(10, 0))
+        self.bulk_textbox = ctk.CTkTextbox(self.modes_frame, width=300, height=70)
+        self.bulk_textbox.pack(pady=5)
+
+        buttons_frame = ctk.CTkFrame(self.modes_frame, fg_color="transparent")
+        buttons_frame.pack(pady=5)
+        add_all_button = ctk.CTkButton(buttons_frame, text="Add All", width=120, font=("Arial", 16, "bold"),
+                                       command=self.on_add_all)
+        add_all_button.pack(side="left", padx=5)
+        import_button = ctk.CTkButton(buttons_frame, text="Import File", width=120, font=("Arial", 16, "bold"),
+                                      command=self.on_import_file)
+        import_button.pack(side="right", padx=5)
+
     def on_enter(self, event):
         """Gets the text from the entry when Enter is pressed.
         Checks if the mode name is valid and there are no duplicates in the modes list,
         in case an invalid name has been entered, puts an alert on the screen and does not append the mode to the list."""
         entry_text = event.widget.get()  # Get the text from the widget that triggered the event
-        if entry_text not in self.entries_list and entry_text.strip():
-            # This validates that there are no duplicates in modes list, and an actual name (not just whitespaces)
-            self.entries_list.append(entry_text) # Appends the Mode to a modes list
-            display_entries_list = "\n".join(self.entries_list)
-            self.mode_display_label.configure(
-            text=f"Current Modes:\n {display_entries_list}") # displays the number of modes and the modes list
+        if self.entries_list.add(entry_text):
+            # ModeList validates that there are no duplicates in modes list, and an actual name (not just whitespaces)
+            self.update_modes_display()
             event.widget.delete(0, ctk.END)  # Clears the entry
 
         else:
-            # Creates an alert label in case the name is invalid
-            if self.alert_label is None or not self.alert_label.winfo_exists():
-                # Create the alert label only if it doesn't already exist or is not visible
-                self.alert_label = ctk.CTkLabel(self.modes_frame, text_color="red", font=("Arial", 16),
-                                       text="Please enter a valid Name.")  # Creates an alert label in case the name is invalid
-            self.alert_label.pack()
-            self.modes_frame.after(1000, self.alert_label.pack_forget)
+            self.show_alert("Please enter a valid Name.")  # alert in case the name is invalid
+
+    def on_add_all(self):
+        """adds every mode pasted in the bulk textbox."""
+        self.add_modes(parse_modes_text(self.bulk_textbox.get("1.0", ctk.END)))
+        self.bulk_textbox.delete("1.0", ctk.END)
+
+    def on_import_file(self):
+        """adds the modes from a text file, one per line or comma separated."""
+        from tkinter import filedialog  # only needed when a file is imported
+
+        file_path = filedialog.askopenfilename(filetypes=[("Text files", "*.txt *.csv"), ("All files", "*.*")])
+        if not file_path:
+            return
+        try:
+            modes = read_modes_file(file_path)
+        except (OSError, UnicodeDecodeError):
+            self.show_alert("Could not read the modes file.")
+            return
+        self.add_modes(modes)
+
+    def add_modes(self, modes):
+        """adds many modes with a single display update, tells how many duplicates were skipped."""
+        added, skipped = self.entries_list.add_many(modes)
+        self.update_modes_display()
+        if skipped:
+            self.show_alert(f"Added {len(added)} modes, skipped {len(skipped)} duplicates.")
+
+    def on_mode_selected(self, mode):
+        self.selected_mode = mode
+
+    def remove_selected_mode(self):
+        if self.selected_mode is None:
+            return
+        self.entries_list.remove(self.selected_mode)
+        self.selected_mode = None
+        self.modes_display.selected = None
+        self.update_modes_display(scroll_to_end=False)
+
+    def update_modes_display(self, scroll_to_end=True):
+        """updates the modes counter, and the virtual list (only its visible rows are redrawn)."""
+        self.mode_display_label.configure(text=f"Current Modes: {len(self.entries_list)}")
+        first = self.modes_display.first
+        self.modes_display.set_items(self.entries_list)
+        self.modes_display.scroll_to(len(self.entries_list) if scroll_to_end else first)  # new modes are at the end
+
+    def reset(self):
+        """clears the modes for the next project."""
+        self.entries_list.clear()
+        self.selected_mode = None
+        self.modes_display.selected = None
+        self.bulk_textbox.delete("1.0", ctk.END)
+        self.update_modes_display()
+
+    def show_alert(self, text):
+        """shows a red alert label for a second."""
+        if self.alert_label is None or not self.alert_label.winfo_exists():
+            # Create the alert label only if it doesn't already exist or is not visible
+            self.alert_label = ctk.CTkLabel(self.modes_frame, text_color="red", font=("Arial", 16), text=text)
+        self.alert_label.configure(text=text)
+        self.alert_label.pack()
+        self.modes_frame.after(1000, self.alert_label.pack_forget)
 
 
     def get_list(self):
-        return self.entries_list
+        return self.entries_list.to_list()
 
 
-def load_default_path():
+def run_in_background(widget, work, on_done=None, on_error=None, on_progress=None, poll_ms=50):
     """
-    This function loads the last default path that has been chosen since changing a main directory.
-    It stores the last path in a config.txt file.
-    if there is no config file, the default path will be C:/Users/User/Desktop/Iron Swords War like in the StormCase laptop.
-    to prevent saving an empty directory, it will save a directory only if one will be chosen.
+    Runs work() in a worker thread, so slow network shares never freeze the window.
+    Tk is not thread safe, so the result is handed over through a queue that is polled with widget.after,
+    on_done(result), on_error(exception) and on_progress(value) always run on the Tk thread.
+    if on_progress is given, work is called with a report_progress(value) function,
+    only the latest progress value of each poll is shown.
     """
-    config_file = "config.txt"  # file to read main directory from
-    if os.path.exists(config_file):
-        with open(config_file, "r", encoding="utf-8") as f:  # Specify UTF-8 encoding when reading
-            saved_path = f.read().strip()
-            if saved_path:  # Return the saved path only if it's not empty
-                return saved_path
-    return "C:/Users/User/Desktop/Iron Swords War"  # Default path if no saved path is found
-
-def save_default_path(path):
+    results = queue.Queue()
+
+    def report_progress(value):
+        results.put(("progress", value))
+
+    def worker():
+        try:
+            result = work(report_progress) if on_progress is not None else work()
+            results.put(("done", result))
+        except Exception as error:  # handed over to on_error
+            results.put(("error", error))
+
+    def poll():
+        progress = None
+        while True:
+            try:
+                kind, value = results.get_nowait()
+            except queue.Empty:
+                break
+            if kind == "progress":
+                progress = (value,)
+                continue
+            if progress is not None:
+                on_progress(progress[0])
+            if kind == "done" and on_done is not None:
+                on_done(value)
+            elif kind == "error" and on_error is not None:
+                on_error(value)
+            return
+        if progress is not None:
+            on_progress(progress[0])
+        widget.after(poll_ms, poll)
+
+    threading.Thread(target=worker, daemon=True).start()
+    widget.after(poll_ms, poll)
+
+def app_initialization(start_time=None):
+    """This is where it all begins...
+    :param start_time: time.perf_counter() at the start of main.py, used to measure startup time.
     """
-    writes the chosen path in the config.txt file to remember the path for next time you open the application.
-    :param path:str
-    """
-    with open("config.txt", "w", encoding="utf-8") as f:
-        f.write(path)
-
-def app_initialization():
-    """This is where it all begins..."""
+    global root
     ctk.set_appearance_mode("dark")  # dark mode
+    with span("startup.ctk_root"):
+        root = ctk.CTk()  # creates a ctk root of the whole app
     root.title("RFeye Site Helper V1.2")  # set app title
-    root.geometry("500x550")  # Set the window size
+    root.geometry("620x650")  # Set the window size
 
-    welcome_screen() # runs first welcome screen
+    with span("startup.welcome_screen"):
+        welcome_screen() # runs first welcome screen
+    if start_time is not None:
+        root.after_idle(lambda: report_startup_time(start_time))  # runs once the welcome screen is painted
     root.mainloop()  # starts GUI
 
+def report_startup_time(start_time):
+    """
+    reports the startup time if it misses STARTUP_TARGET_SECONDS, or always if SCFH_STARTUP_TIME is set.
+    it is printed and written to STARTUP_TIME_FILE next to the exe, the packed app has no console.
+    the PyInstaller unpack happens before main.py runs, so it is not included.
+    """
+    root.update_idletasks()
+    elapsed = time.perf_counter() - start_time
+    record("startup.first_paint", elapsed, start_time)
+    if os.environ.get("SCFH_STARTUP_TIME") or elapsed > STARTUP_TARGET_SECONDS:
+        line = f"startup: {elapsed:.3f}s (target {STARTUP_TARGET_SECONDS:.1f}s)"
+        print(line, file=sys.stderr)
+        try:
+            with open(app_file(STARTUP_TIME_FILE), "w", encoding="utf-8") as f:
+                f.write(f"{time.strftime('%Y-%m-%d %H:%M:%S')} {line}\n")
+        except OSError:
+            pass  # e.g. the exe is in a read-only folder
+
 def welcome_screen():
     """
     Creates a main frame and introduction to the app
@@ -363,35 +1107,57 @@ def get_project_name(frame):
     project_name_entry.pack(pady=10) # creates an entry for project name
     return project_name_entry
 
-def inner_folders_switch_state(frame):
+def folder_template_menu(frame, template_names, template_errors):
     """
-    Creates a switch to ask if user wants to create Recordings and Pictures
-    folders inside the new project folder.
-    Sets switch value as 1 on default.
+    Creates a menu to choose the folders that will be created inside the new project folder.
+    templates are read from templates.txt, "Recordings and Pictures" is chosen on default.
+    invalid templates are listed under the menu.
     :param frame: root/frame
-    :return: recs_and_pics_switch
+    :param template_names: names of the loaded templates
+    :param template_errors: error messages of the invalid templates
+    :return: template_menu
+    """
+    template_label = ctk.CTkLabel(frame, text="Folders inside the project:", font=("Arial", 16, "bold"))
+    template_label.pack(pady=(20, 5))
+    template_menu = ctk.CTkOptionMenu(frame, values=template_names, width=300, font=("Arial", 16, "bold"))
+    template_menu.set(DEFAULT_TEMPLATE_NAME)  # Recordings and Pictures by default
+    template_menu.pack(pady=5)
+    if template_errors:
+        errors_label = ctk.CTkLabel(frame, text_color="#ff4249", font=("Arial", 12),
+                                    text="Invalid templates in templates.txt:\n" + "\n".join(template_errors))
+        errors_label.pack(pady=5)
+    return template_menu
+
+def staged_creation_switch(frame, settings):
     """
-    recs_and_pics_switch = ctk.CTkSwitch(frame,
-                                         text="Create Recordings and Photos Folders [Recommended]",
-                                         font=("Arial", 16, "bold"), hover=True)
-    # create a switch to allow creation of recordings and pictures folders inside the new project folder
-    recs_and_pics_switch.select()  # makes the switch turned on by default.
-    recs_and_pics_switch.pack(pady=20)
-    return  recs_and_pics_switch
+    Creates a switch to build new projects in a hidden staging folder and publish them at once,
+    colleagues browsing the share never see a half created project.
+    the choice is saved in the settings.
+    :param frame: root/frame
+    :param settings: the app settings
+    :return: staged_switch
+    """
+    staged_switch = ctk.CTkSwitch(frame, text="Build hidden, then publish at once",
+                                  font=("Arial", 16, "bold"), hover=True,
+                                  command=lambda: settings.set("staged_creation", bool(staged_switch.get())))
+    if settings.get("staged_creation"):
+        staged_switch.select()
+    staged_switch.pack(pady=10)
+    return staged_switch
 
 def choose_directory(current_path, directory_label):
     """
     opens a file dialog to choose a directory to read folders from.
     The code will get categories folders from this directory.
-    :param current_path: path from config.txt file
+    :param current_path: current main directory from the settings
     :param directory_label: updates the directory label to see what is the chosen directory.
     """
-
+    from tkinter import filedialog  # only needed when the directory is changed
 
     selected_directory = filedialog.askdirectory()  # Open a dialog to choose a directory
     if selected_directory != current_path and selected_directory:  # Ensure user selects a valid path
         current_path = selected_directory
-        save_default_path(current_path)  # Save the new selected directory
+        get_settings().set("main_folder", current_path)  # Save the new selected directory, notifies the tabs
         directory_label.configure(text=f"Current Folder: {current_path}\n Click to change Folder:")
 
 def change_directory_popup(current_path, directory_label):
@@ -417,12 +1183,13 @@ def change_directory_popup(current_path, directory_label):
     # Set focus to the popup window
     warning_popup.focus_force()
 
-def show_project_creation_popup(new_project_path):
+def show_project_creation_popup(new_project_path, on_create_another=None):
     """creates a popup window upon project creation.
     adds a button to close popup and app,
-    and button to open containing folder."""
+    and button to open containing folder.
+    if on_create_another is given, adds a button to create another project in the same window."""
     popup = ctk.CTkToplevel()
-    popup.geometry("300x150")
+    popup.geometry("600x150" if on_create_another is not None else "450x150")
     popup.title("Success!")
     label = ctk.CTkLabel(popup, text="Folder has been Created! \n Good Luck!", font=("Arial", 16, "bold"))
     label.pack(pady=20)
@@ -431,11 +1198,157 @@ def show_project_creation_popup(new_project_path):
     close_button.pack(side="left", pady=10, padx=10)
     close_button = ctk.CTkButton(popup, text="Close App",font=("Arial", 16, "bold"), command=lambda: root.destroy())
     close_button.pack(side="right", pady=10, padx=10)
+    ingest_button = ctk.CTkButton(popup, text="Ingest Media", font=("Arial", 16, "bold"),
+                                  command=lambda: ingest_window(new_project_path))
+    ingest_button.pack(side="left", pady=10, padx=10)
+    if on_create_another is not None:
+        another_button = ctk.CTkButton(popup, text="Create Another", font=("Arial", 16, "bold"), fg_color="green",
+                                       command=lambda: (popup.destroy(), on_create_another()))
+        another_button.pack(side="right", pady=10, padx=10)
+    # Make the popup modal
+    popup.transient(root)
+    # Set focus to the popup window
+    popup.focus_force()
+
+def ingest_window(project_path):
+    """creates a window that copies captures from a source folder (SD card, recorder) into the project.
+    the rules map files to modes, see ingest.py, they start as one rule per mode of the project.
+    files are copied and verified in the background with per mode progress,
+    Cancel stops between blocks and a later Start continues where it stopped."""
+    window = ctk.CTkToplevel()
+    window.geometry("600x520")
+    window.title(f"Ingest Media - {os.path.basename(project_path)}")
+    source = {"folder": ""}
+    cancel_event = threading.Event()
+
+    source_label = ctk.CTkLabel(window, text="No source folder chosen", font=("Arial", 14))
+    source_label.pack(pady=(10, 0))
+
+    def choose_source():
+        from tkinter import filedialog  # only needed when ingesting
+        folder = filedialog.askdirectory(parent=window)
+        if folder:
+            source["folder"] = folder
+            source_label.configure(text=folder)
+
+    ctk.CTkButton(window, text="Choose Source Folder", font=("Arial", 16, "bold"), command=choose_source).pack(pady=5)
+    ctk.CTkLabel(window, text="Rules: mode = ...; ext = ...; name = ...; from = ...; to = ...",
+                 font=("Arial", 12)).pack()
+    rules_box = ctk.CTkTextbox(window, height=120, font=("Arial", 14))
+    rules_box.pack(pady=5, padx=10, fill="x")
+    rules_box.insert("1.0", default_rules_text(find_modes(project_path)))
+
+    progress_list = VirtualList(window, on_select=lambda item: None, visible_rows=5, row_height=28,
+                                font=("Arial", 14))
+    status_label = ctk.CTkLabel(window, text="", font=("Arial", 14, "bold"))
+    status_label.pack(pady=5)
+
+    def show_progress(modes):
+        progress_list.items = [progress.describe(mode) for mode, progress in modes.items()]
+        progress_list.render()  # keeps the scroll position, unlike set_items
+
+    def on_done(result):
+        report, unmatched = result
+        show_progress(report.modes)
+        status = "Cancelled, Start continues. " if report.cancelled else ""
+        status_label.configure(text=f"{status}copied {len(report.copied)}, already copied {len(report.skipped)}, "
+                                    f"failed {len(report.failed)}, no matching rule {len(unmatched)}")
+        start_button.configure(state="normal")
+        cancel_button.configure(state="disabled")
+
+    def on_error(error):
+        status_label.configure(text=f"Ingest failed: {error}")
+        start_button.configure(state="normal")
+        cancel_button.configure(state="disabled")
+
+    def start():
+        if not source["folder"]:
+            status_label.configure(text="Choose a source folder first")
+            return
+        try:
+            rules = parse_rules(rules_box.get("1.0", ctk.END))
+        except RuleError as error:
+            status_label.configure(text=str(error))
+            return
+        cancel_event.clear()
+        start_button.configure(state="disabled")
+        cancel_button.configure(state="normal")
+        status_label.configure(text="Copying...")
+
+        def work(report_progress):
+            items, unmatched = plan_ingest(source["folder"], project_path, rules)
+            return run_ingest(items, project_path, progress=report_progress, cancel_event=cancel_event), unmatched
+
+        run_in_background(window, work, on_done=on_done, on_error=on_error, on_progress=show_progress, poll_ms=200)
+
+    start_button = ctk.CTkButton(window, text="Start", font=("Arial", 16, "bold"), fg_color="green", command=start)
+    start_button.pack(side="left", pady=10, padx=10)
+    cancel_button = ctk.CTkButton(window, text="Cancel", font=("Arial", 16, "bold"), state="disabled",
+                                  command=cancel_event.set)
+    cancel_button.pack(side="right", pady=10, padx=10)
+    window.protocol("WM_DELETE_WINDOW", lambda: (cancel_event.set(), window.destroy()))
+    window.transient(root)
+    window.focus_force()
+
+def creation_progress_popup(cancel_event):
+    """creates a popup that shows the folder creation progress,
+    the Cancel button sets cancel_event, the worker stops and rolls back.
+    :return: popup, progress bar, progress label"""
+    popup = ctk.CTkToplevel()
+    popup.geometry("300x150")
+    popup.title("Creating...")
+    label = ctk.CTkLabel(popup, text="Creating folders...", font=("Arial", 16, "bold"))
+    label.pack(pady=10)
+    progress_bar = ctk.CTkProgressBar(popup, width=250)
+    progress_bar.set(0)
+    progress_bar.pack(pady=5)
+
+    cancel_button = ctk.CTkButton(popup, text="Cancel", font=("Arial", 16, "bold"),
+                                  command=lambda: (cancel_event.set(), cancel_button.configure(state="disabled")))
+    cancel_button.pack(pady=10)
+    popup.protocol("WM_DELETE_WINDOW", cancel_event.set)  # closing the popup cancels too
+    # Make the popup modal
+    popup.transient(root)
+    popup.grab_set()
+    return popup, progress_bar, label
+
+def creation_failed_popup(error):
+    """creates a popup when folder creation has been cancelled or failed, tells what has been rolled back."""
+    popup = ctk.CTkToplevel()
+    popup.title("Cancelled" if getattr(error, "cancelled", False) else "Error!")
+    if isinstance(error, CreationFailed):
+        title = "Folder creation has been cancelled." if error.cancelled else f"Folder creation failed:\n {error.reason}"
+        text = f"{title}\n {len(error.removed)} created folders have been removed."
+        if error.leftovers:
+            text += f"\n {len(error.leftovers)} folders could not be removed,\n starting with:\n {error.leftovers[0]}"
+    else:
+        text = f"Folder creation failed:\n {error}"
+    label = ctk.CTkLabel(popup, text=text, font=("Arial", 16, "bold"))
+    label.pack(pady=20, padx=10)
+
+    close_button = ctk.CTkButton(popup, text="Ok", font=("Arial", 16, "bold"), command=lambda: popup.destroy())
+    close_button.pack(pady=10)
     # Make the popup modal
     popup.transient(root)
     # Set focus to the popup window
     popup.focus_force()
 
+def move_conflicts_popup(conflicts):
+    """creates a popup that lists the projects that could not be moved and why."""
+    popup = ctk.CTkToplevel()
+    popup.geometry("600x300")
+    popup.title("Not moved")
+    label = ctk.CTkLabel(popup, text=f"{len(conflicts)} projects were not moved:", font=("Arial", 16, "bold"))
+    label.pack(pady=10)
+    textbox = ctk.CTkTextbox(popup, font=("Arial", 14))
+    textbox.pack(fill="both", expand=True, padx=10)
+    textbox.insert("1.0", "\n".join(f"{os.path.basename(source)}: {reason}" for source, destination, reason in conflicts))
+    textbox.configure(state="disabled")
+    close_button = ctk.CTkButton(popup, text="Ok", font=("Arial", 16, "bold"), command=lambda: popup.destroy())
+    close_button.pack(pady=10)
+    popup.transient(root)
+    popup.focus_force()
+
 def no_category_popup(tab):
     """raises a popup in case no category has been chosen. has 2 buttons: either continue in an uncategorized folder or choose category"""
     popup = ctk.CTkToplevel()
@@ -0,0 +1,460 @@
+import argparse
+import fnmatch
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from folder_plan import InvalidNameError, check_folder_name
+from profiling import span
+
+# Media ingest: copies captures off SD cards and recorders into the mode folders of a project.
+#
+# Rules file / text, one rule per line, the first matching rule wins:
+#   mode = Mode A; ext = .wav .iq; name = *_A_*; from = 2024-05-01 10:00; to = 2024-05-01 12:00
+# every key but mode is optional. name is a filename pattern (* and ?), from/to compare the capture time,
+# which is the file's modified time (cameras and recorders set it when they capture).
+# pictures go to Pictures/<mode>, everything else to Recordings/<mode>,
+# or straight to <mode> if the project has no Recordings and Pictures folders.
+#
+# every file is copied with a large buffer while its checksum is computed, the copy is read back and
+# verified before it replaces the .part file. verified files are written to a journal in the project folder,
+# so an interrupted ingest skips them and continues partial copies from where they stopped.
+# a file name that is already taken by another file (a second card, counters restart) gets a "name (2).ext" copy,
+# an existing file is never replaced. a destination claimed by the same source is checked against it instead,
+# the app may have stopped between renaming the verified copy and writing it to the journal.
+
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".bmp", ".gif", ".tif", ".tiff", ".heic", ".raw", ".cr2", ".nef", ".dng"}
+JOURNAL_FILE = ".scfh-ingest.jsonl"  # inside the project folder
+PART_SUFFIX = ".part"
+BUFFER_SIZE = 4 * 1024 * 1024  # large reads and writes, few round trips to the share
+DEFAULT_WORKERS = 4
+TIME_FORMAT = "%Y-%m-%d %H:%M"
+
+
+class RuleError(ValueError):
+    """raised when a rule line is invalid."""
+
+
+class VerificationError(OSError):
+    """raised when a copied file does not match its source."""
+
+
+class IngestRule:
+    """maps source files to a mode by extension, filename pattern and capture time."""
+    def __init__(self, mode, extensions=None, pattern=None, start=None, end=None):
+        self.mode:str = mode
+        self.extensions = extensions  # set of lower case extensions with the dot, None for any
+        self.pattern = pattern.lower() if pattern else None
+        self.start = start  # timestamps, None for no limit
+        self.end = end
+
+    def matches(self, name, mtime):
+        if self.extensions is not None and os.path.splitext(name)[1].lower() not in self.extensions:
+            return False
+        if self.pattern is not None and not fnmatch.fnmatchcase(name.lower(), self.pattern):
+            return False
+        if self.start is not None and mtime < self.start:
+            return False
+        if self.end is not None and mtime > self.end:
+            return False
+        return True
+
+
+class IngestItem:
+    """a single file to copy."""
+    def __init__(self, source, destination, mode, size, mtime):
+        self.source:str = source
+        self.destination:str = destination
+        self.mode:str = mode
+        self.size:int = size
+        self.mtime:float = mtime
+
+
+class ModeProgress:
+    """progress of a single mode, shown as bytes, files and throughput."""
+    def __init__(self):
+        self.total_bytes:int = 0
+        self.copied_bytes:int = 0
+        self.total_files:int = 0
+        self.done_files:int = 0
+        self.failed_files:int = 0
+        self.started = None  # time of the first copied byte
+
+    def throughput(self):
+        """bytes per second since the first copied byte of this mode."""
+        if self.started is None:
+            return 0.0
+        return self.copied_bytes / max(time.perf_counter() - self.started, 1e-6)
+
+    def describe(self, mode):
+        return (f"{mode}: {self.done_files}/{self.total_files} files, "
+                f"{self.copied_bytes / 2 ** 20:.0f}/{self.total_bytes / 2 ** 20:.0f} MB, "
+                f"{self.throughput() / 2 ** 20:.1f} MB/s" + (f", {self.failed_files} failed" if self.failed_files else ""))
+
+
+class IngestReport:
+    def __init__(self):
+        self.copied:list = []
+        self.skipped:list = []  # already copied and verified by an earlier run
+        self.failed:list = []  # (item, error)
+        self.unmatched:list = []  # source files no rule matched
+        self.cancelled:bool = False
+        self.modes:dict = {}  # mode -> ModeProgress
+
+
+def parse_time(text):
+    try:
+        return time.mktime(time.strptime(text.strip(), TIME_FORMAT))
+    except ValueError as error:
+        raise RuleError(f"invalid time '{text}', use YYYY-MM-DD HH:MM") from error
+
+
+def parse_rules(text):
+    """
+    parses the rules text, one rule per line, '#' starts a comment.
+    :return: list of IngestRule
+    :raises RuleError: with the line number of the invalid rule
+    """
+    rules = []
+    for line_number, line in enumerate(text.splitlines(), start=1):
+        line = line.split("#", 1)[0].strip()
+        if not line:
+            continue
+        values = {}
+        for part in line.split(";"):
+            key, separator, value = part.partition("=")
+            if not separator or not value.strip():
+                raise RuleError(f"line {line_number}: '{part.strip()}' should be key = value")
+            values[key.strip().lower()] = value.strip()
+        unknown = set(values) - {"mode", "ext", "name", "from", "to"}
+        if unknown:
+            raise RuleError(f"line {line_number}: unknown key {', '.join(sorted(unknown))}")
+        if "mode" not in values:
+            raise RuleError(f"line {line_number}: every rule needs a mode")
+        try:
+            check_folder_name("mode", values["mode"])  # a mode is a single folder inside the project
+            extensions = None
+            if "ext" in values:
+                extensions = {ext.lower() if ext.startswith(".") else "." + ext.lower()
+                              for ext in values["ext"].replace(",", " ").split()}
+            rules.append(IngestRule(values["mode"], extensions, values.get("name"),
+                                    parse_time(values["from"]) if "from" in values else None,
+                                    parse_time(values["to"]) if "to" in values else None))
+        except (RuleError, InvalidNameError) as error:
+            raise RuleError(f"line {line_number}: {error}") from error
+    return rules
+
+
+def default_rules_text(modes):
+    """a rule per mode, matching files that have the mode name in their name."""
+    return "\n".join(f"mode = {mode}; name = *{mode}*" for mode in modes)
+
+
+def mode_folder(project_path, mode, name, inner_folders):
+    if not inner_folders:
+        return os.path.join(project_path, mode)
+    inner_folder = "Pictures" if os.path.splitext(name)[1].lower() in IMAGE_EXTENSIONS else "Recordings"
+    return os.path.join(project_path, inner_folder, mode)
+
+
+def plan_ingest(source_folder, project_path, rules):
+    """
+    walks the source folder with os.scandir and maps every file to a mode folder of the project,
+    sub folders of the source are kept under the mode folder.
+    :return: (list of IngestItem, list of unmatched source paths)
+    """
+    inner_folders = os.path.isdir(os.path.join(project_path, "Recordings")) or \
+        os.path.isdir(os.path.join(project_path, "Pictures"))
+    items = []
+    unmatched = []
+    folders = [(source_folder, "")]
+    while folders:
+        folder, relative = folders.pop()
+        with os.scandir(folder) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    folders.append((entry.path, os.path.join(relative, entry.name)))
+                    continue
+                if not entry.is_file():
+                    continue
+                stat = entry.stat()
+                rule = next((rule for rule in rules if rule.matches(entry.name, stat.st_mtime)), None)
+                if rule is None:
+                    unmatched.append(entry.path)
+                    continue
+                destination = os.path.join(mode_folder(project_path, rule.mode, entry.name, inner_folders),
+                                           relative, entry.name)
+                items.append(IngestItem(entry.path, destination, rule.mode, stat.st_size, stat.st_mtime))
+    return items, unmatched
+
+
+def file_hash(path, limit=None):
+    """sha256 of a file (or of its first limit bytes), read in large blocks."""
+    digest = hashlib.sha256()
+    remaining = limit
+    buffer = bytearray(BUFFER_SIZE)
+    view = memoryview(buffer)
+    with open(path, "rb", buffering=0) as f:
+        while remaining is None or remaining > 0:
+            size = f.readinto(view if remaining is None else view[:min(BUFFER_SIZE, remaining)])
+            if not size:
+                break
+            digest.update(view[:size])
+            if remaining is not None:
+                remaining -= size
+    return digest.hexdigest()
+
+
+class Journal:
+    """
+    the copies of a project, shared by the worker threads, one JSON line per file:
+    a line without sha256 claims a destination before the copy starts, a line with it marks the copy as verified.
+    a source file is known by its path, size and modified time, so a second card with the same file names
+    (camera counters restart) never maps to a destination that belongs to another file.
+    """
+    def __init__(self, project_path):
+        self.path:str = os.path.join(project_path, JOURNAL_FILE)
+        self.lock = threading.Lock()
+        self.done:dict = {}  # source key -> verified entry
+        self.started:dict = {}  # source key -> claimed destination
+        self.claimed:set = set()  # normcase destinations of every entry
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # a line cut by a crash
+                    key = source_key(entry["source"], entry["size"], entry["mtime"])
+                    self.claimed.add(os.path.normcase(entry["destination"]))
+                    if "sha256" in entry:
+                        self.done[key] = entry
+                    else:
+                        self.started[key] = entry["destination"]
+        except OSError:
+            pass
+
+    def is_done(self, item):
+        """copied and verified by an earlier run, and still there. item.destination is set to that copy."""
+        entry = self.done.get(source_key(item.source, item.size, item.mtime))
+        if entry is None:
+            return False
+        item.destination = entry["destination"]
+        try:
+            return os.stat(item.destination).st_size == item.size
+        except OSError:
+            return False
+
+    def claim(self, item):
+        """
+        sets item.destination to the destination of this source: the one of an earlier run (to continue its .part file),
+        or a free one - "name (2).ext" when the name is already taken by another file.
+        """
+        key = source_key(item.source, item.size, item.mtime)
+        with self.lock:
+            if key in self.done:
+                item.destination = self.done[key]["destination"]
+                return
+            if key in self.started:
+                item.destination = self.started[key]
+                return
+            item.destination = self.free_destination(item.destination)
+            self.claimed.add(os.path.normcase(item.destination))
+            self.started[key] = item.destination
+            self.write({"source": item.source, "destination": item.destination, "size": item.size,
+                        "mtime": item.mtime})
+
+    def free_destination(self, destination):
+        stem, extension = os.path.splitext(destination)
+        candidate = destination
+        number = 2
+        while os.path.normcase(candidate) in self.claimed or os.path.exists(candidate) \
+                or os.path.exists(candidate + PART_SUFFIX):
+            candidate = f"{stem} ({number}){extension}"
+            number += 1
+        return candidate
+
+    def add(self, item, checksum):
+        entry = {"source": item.source, "destination": item.destination, "size": item.size,
+                 "mtime": item.mtime, "sha256": checksum}
+        with self.lock:
+            self.write(entry)
+            self.done[source_key(item.source, item.size, item.mtime)] = entry
+
+    def write(self, entry):
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+
+def source_key(source, size, mtime):
+    return os.path.normcase(source), size, mtime
+
+
+def existing_copy(item):
+    """
+    checks a destination that already exists: the app may have stopped after renaming a verified copy into place,
+    before it was written to the journal. the .part file of that copy is removed.
+    :return: sha256 of the file if the destination is a full copy of the source, None if there is no destination
+    :raises FileExistsError: the destination is another file, it is never replaced
+    """
+    try:
+        size = os.stat(item.destination).st_size
+    except FileNotFoundError:
+        return None
+    checksum = file_hash(item.source)
+    if size != item.size or file_hash(item.destination) != checksum:
+        raise FileExistsError(f"{item.destination} already exists and is not a copy of {item.source}")
+    try:
+        os.remove(item.destination + PART_SUFFIX)
+    except FileNotFoundError:
+        pass
+    os.utime(item.destination, (item.mtime, item.mtime))
+    return checksum
+
+
+def copy_verified(item, on_bytes=None, cancel_event=None):
+    """
+    copies a file into a .part file while hashing the source, continues an existing .part file,
+    reads the copy back to verify it and then renames it into place.
+    :param on_bytes: called with the number of newly copied bytes
+    :return: sha256 of the file
+    :raises VerificationError: the copy does not match the source, the .part file is removed
+    :raises FileExistsError: the destination has been created meanwhile, it is never replaced
+    """
+    if cancel_event is not None and cancel_event.is_set():
+        return None  # queued when Cancel was pressed, nothing is created
+    part = item.destination + PART_SUFFIX
+    os.makedirs(os.path.dirname(item.destination), exist_ok=True)
+    try:
+        offset = os.stat(part).st_size
+    except OSError:
+        offset = 0
+    if offset > item.size:
+        os.remove(part)
+        offset = 0
+
+    digest = hashlib.sha256()
+    buffer = bytearray(BUFFER_SIZE)
+    view = memoryview(buffer)
+    with open(item.source, "rb", buffering=0) as source, open(part, "ab" if offset else "wb") as target:
+        remaining = offset
+        while remaining > 0:  # the part already copied, hashed only (the source is local and fast)
+            size = source.readinto(view[:min(BUFFER_SIZE, remaining)])
+            if not size:
+                break
+            digest.update(view[:size])
+            remaining -= size
+        while True:
+            if cancel_event is not None and cancel_event.is_set():
+                return None  # the .part file is kept, the next run continues it
+            size = source.readinto(view)
+            if not size:
+                break
+            digest.update(view[:size])
+            target.write(view[:size])
+            if on_bytes is not None:
+                on_bytes(size)
+    checksum = digest.hexdigest()
+    if file_hash(part) != checksum:
+        os.remove(part)
+        raise VerificationError(f"copy of {item.source} does not match the source")
+    if os.path.exists(item.destination):
+        raise FileExistsError(f"{item.destination} already exists, the copy is kept as {part}")
+    os.rename(part, item.destination)
+    os.utime(item.destination, (item.mtime, item.mtime))  # keep the capture time
+    return checksum
+
+
+def run_ingest(items, project_path, workers=DEFAULT_WORKERS, progress=None, cancel_event=None):
+    """
+    copies the items with a bounded thread pool.
+    :param progress: called with a dict of mode -> ModeProgress after every copied block (from the workers)
+    :return: IngestReport
+    """
+    report = IngestReport()
+    journal = Journal(project_path)
+    modes = report.modes
+    lock = threading.Lock()
+    for item in items:
+        mode_progress = modes.setdefault(item.mode, ModeProgress())
+        mode_progress.total_bytes += item.size
+        mode_progress.total_files += 1
+
+    def skip(item):
+        """already copied by an earlier run, it does not count in the progress of this one."""
+        mode_progress = modes[item.mode]
+        with lock:
+            mode_progress.total_bytes -= item.size
+            mode_progress.total_files -= 1
+            report.skipped.append(item)
+
+    def copy(item):
+        mode_progress = modes[item.mode]
+        if journal.is_done(item):
+            skip(item)
+            return
+
+        def on_bytes(size):
+            with lock:
+                if mode_progress.started is None:
+                    mode_progress.started = time.perf_counter()
+                mode_progress.copied_bytes += size
+            if progress is not None:
+                progress(modes)
+
+        try:
+            if cancel_event is not None and cancel_event.is_set():
+                return
+            journal.claim(item)
+            checksum = existing_copy(item)  # only a destination claimed by this source can exist
+            if checksum is not None:
+                journal.add(item, checksum)
+                skip(item)
+                return
+            checksum = copy_verified(item, on_bytes, cancel_event)
+        except OSError as error:
+            with lock:
+                mode_progress.failed_files += 1
+                report.failed.append((item, error))
+            return
+        if checksum is None:
+            return  # cancelled
+        journal.add(item, checksum)
+        with lock:
+            mode_progress.done_files += 1
+            report.copied.append(item)
+        if progress is not None:
+            progress(modes)
+
+    with span("ingest.copy"), ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(copy, items))
+    report.cancelled = cancel_event is not None and cancel_event.is_set()
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="SCFHV1.2 ingest",
+                                     description="Copy captures into the mode folders of a project.")
+    parser.add_argument("source", help="folder to copy from (SD card, recorder)")
+    parser.add_argument("project", help="project folder to copy into")
+    parser.add_argument("--rules", required=True, help="rules file, see ingest.py")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    args = parser.parse_args(argv)
+
+    with open(args.rules, "r", encoding="utf-8-sig") as f:
+        rules = parse_rules(f.read())
+    items, unmatched = plan_ingest(args.source, args.project, rules)
+    report = run_ingest(items, args.project, args.workers)
+    print(f"copied {len(report.copied)}, already copied {len(report.skipped)}, "
+          f"failed {len(report.failed)}, no matching rule {len(unmatched)}")
+    for item, error in report.failed:
+        print(f"FAILED {item.source}: {error}")
+    return 1 if report.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,4 +1,18 @@
-from functions import *
+import multiprocessing
+import sys
+import time
+
+START_TIME = time.perf_counter()  # startup time is measured from here, see report_startup_time
+
+import profiling
 
 if __name__ == "__main__":
-    app_initialization()  # this will run the whole packed app
+    multiprocessing.freeze_support()  # archiving compresses in worker processes, needed by the packed exe
+    profiling.enable_from_args(sys.argv)  # --profile or SCFH_PROFILE, see profiling.py
+    if len(sys.argv) > 1 and sys.argv[1] == "batch":
+        # SCFHV1.2 batch manifest.csv -> creates all projects without opening the app window
+        from batch import main as batch_main
+        sys.exit(batch_main(sys.argv[2:]))
+    with profiling.span("startup.import_functions"):
+        from functions import app_initialization  # imports customtkinter, only needed for the app window
+    app_initialization(START_TIME)  # this will run the whole packed app
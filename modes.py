@@ -0,0 +1,68 @@
+import re
+
+MODES_SEPARATORS = re.compile(r"[,\n\r]+")  # bulk modes can be separated by new lines or commas
+
+
+class ModeList:
+    """
+    An ordered set of mode names.
+    backed by a dict, so checking for duplicates is O(1) instead of scanning a list,
+    and the modes keep the order they were added in.
+    """
+    def __init__(self, modes=()):
+        self._modes:dict = {}
+        self.add_many(modes)
+
+    def add(self, mode):
+        """
+        adds a mode, surrounding whitespaces are removed.
+        :return: True if the mode was added, False if it is blank or a duplicate
+        """
+        mode = mode.strip()
+        if not mode or mode in self._modes:
+            return False
+        self._modes[mode] = None
+        return True
+
+    def add_many(self, modes):
+        """
+        adds many modes at once.
+        :return: (added modes, skipped modes) skipped modes are blanks and duplicates
+        """
+        added = []
+        skipped = []
+        for mode in modes:
+            if self.add(mode):
+                added.append(mode.strip())
+            elif mode.strip():
+                skipped.append(mode.strip())
+        return added, skipped
+
+    def remove(self, mode):
+        self._modes.pop(mode, None)
+
+    def clear(self):
+        self._modes.clear()
+
+    def to_list(self):
+        return list(self._modes)
+
+    def __contains__(self, mode):
+        return mode.strip() in self._modes
+
+    def __len__(self):
+        return len(self._modes)
+
+    def __iter__(self):
+        return iter(self._modes)
+
+
+def parse_modes_text(text):
+    """splits pasted text into mode names, by new lines or commas. blank names are dropped."""
+    return [mode.strip() for mode in MODES_SEPARATORS.split(text) if mode.strip()]
+
+
+def read_modes_file(path):
+    """reads mode names from a text file, one per line or comma separated."""
+    with open(path, "r", encoding="utf-8-sig") as f:  # utf-8-sig handles Notepad's BOM
+        return parse_modes_text(f.read())
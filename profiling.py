@@ -0,0 +1,220 @@
+import atexit
+import json
+import os
+import sys
+import threading
+import time
+
+from settings import app_file
+
+# Hot path instrumentation, off by default.
+# enable with --profile (or --profile=trace.jsonl) or the SCFH_PROFILE environment variable (1 or a trace path).
+# when enabled:
+#   - span("name") times a phase (startup, category scan, tab layout, folder creation...)
+#   - the filesystem calls below are counted and timed, wherever they are called from
+#   - every span and filesystem call is written to a JSON-lines trace, a summary table is written on exit
+# when disabled span() returns a shared do-nothing object and nothing is wrapped.
+
+PROFILE_ENV = "SCFH_PROFILE"
+PROFILE_FLAG = "--profile"
+TRACE_FILE = "scfh_trace.jsonl"  # next to the executable
+FS_CALLS = ("stat", "lstat", "mkdir", "rmdir", "scandir", "listdir", "rename", "replace", "remove")
+
+
+class _NoSpan:
+    """returned by span() while profiling is disabled."""
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+NO_SPAN = _NoSpan()
+_profiler = None
+
+
+def span(name):
+    """
+    times a phase: with span("categories.scan"): ...
+    costs a single global lookup while profiling is disabled.
+    """
+    if _profiler is None:
+        return NO_SPAN
+    return _Span(_profiler, name)
+
+
+def record(name, duration, start=None):
+    """records a phase that was timed elsewhere (e.g. the PyInstaller unpack)."""
+    if _profiler is not None:
+        _profiler.add_span(name, duration, start)
+
+
+def enabled():
+    return _profiler is not None
+
+
+class _Span:
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name:str = name
+        self.start:float = 0.0
+        self.fs_calls_before:int = 0
+
+    def __enter__(self):
+        self.fs_calls_before = self.profiler.fs_call_count
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        duration = time.perf_counter() - self.start
+        self.profiler.add_span(self.name, duration, self.start,
+                               fs_calls=self.profiler.fs_call_count - self.fs_calls_before,
+                               failed=exc_info[0] is not None)
+        return False
+
+
+class Profiler:
+    """collects spans and filesystem calls, writes them to the trace file as they happen."""
+    def __init__(self, trace_path):
+        self.trace_path:str = trace_path
+        self.trace = open(trace_path, "w", encoding="utf-8")
+        self.lock = threading.Lock()
+        self.origin:float = time.perf_counter()
+        self.spans:dict = {}  # name -> [count, total seconds, max seconds]
+        self.fs_calls:dict = {}  # call -> [count, total seconds, max seconds]
+        self.fs_call_count:int = 0  # spans report the filesystem calls made while they ran (all threads)
+        self.originals:dict = {}
+
+    def write(self, event):
+        self.trace.write(json.dumps(event, ensure_ascii=False) + "\n")
+
+    def add_span(self, name, duration, start=None, fs_calls=None, failed=False):
+        event = {"type": "span", "name": name, "duration": round(duration, 6),
+                 "start": round((start if start is not None else time.perf_counter() - duration) - self.origin, 6),
+                 "thread": threading.current_thread().name}
+        if fs_calls is not None:
+            event["fs_calls"] = fs_calls
+        if failed:
+            event["failed"] = True
+        with self.lock:
+            add_timing(self.spans, name, duration)
+            self.write(event)
+
+    def add_fs_call(self, call, path, duration):
+        with self.lock:
+            self.fs_call_count += 1
+            add_timing(self.fs_calls, call, duration)
+            self.write({"type": "fs", "call": call, "path": str(path), "duration": round(duration, 6),
+                        "thread": threading.current_thread().name})
+
+    def wrap_fs(self):
+        """replaces the os filesystem calls with timed versions, os.path and shutil use them too."""
+        for call in FS_CALLS:
+            original = getattr(os, call)
+            self.originals[call] = original
+            setattr(os, call, self.timed(call, original))
+
+    def unwrap_fs(self):
+        for call, original in self.originals.items():
+            setattr(os, call, original)
+        self.originals = {}
+
+    def timed(self, call, original):
+        def wrapper(path=".", *args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return original(path, *args, **kwargs)
+            finally:
+                self.add_fs_call(call, path, time.perf_counter() - start)
+        wrapper.__wrapped__ = original
+        return wrapper
+
+    def summary(self):
+        """the summary table, slowest phases first."""
+        lines = [f"{'phase':<40}{'count':>8}{'total ms':>12}{'max ms':>12}"]
+        for name, (count, total, longest) in sorted(self.spans.items(), key=lambda item: -item[1][1]):
+            lines.append(f"{name:<40}{count:>8}{total * 1000:>12.1f}{longest * 1000:>12.1f}")
+        lines.append("")
+        lines.append(f"{'filesystem call':<40}{'count':>8}{'total ms':>12}{'max ms':>12}")
+        for call, (count, total, longest) in sorted(self.fs_calls.items(), key=lambda item: -item[1][1]):
+            lines.append(f"{call:<40}{count:>8}{total * 1000:>12.1f}{longest * 1000:>12.1f}")
+        return "\n".join(lines)
+
+    def close(self):
+        self.unwrap_fs()
+        with self.lock:
+            self.write({"type": "summary",
+                        "spans": {name: {"count": c, "total": round(t, 6), "max": round(m, 6)}
+                                  for name, (c, t, m) in self.spans.items()},
+                        "fs_calls": {call: {"count": c, "total": round(t, 6), "max": round(m, 6)}
+                                     for call, (c, t, m) in self.fs_calls.items()}})
+            self.trace.close()
+        summary = self.summary()
+        summary_path = os.path.splitext(self.trace_path)[0] + "_summary.txt"
+        with open(summary_path, "w", encoding="utf-8") as f:  # the packed app has no console
+            f.write(summary + "\n")
+        print(summary, file=sys.stderr)
+
+
+def add_timing(table, name, duration):
+    timing = table.setdefault(name, [0, 0.0, 0.0])
+    timing[0] += 1
+    timing[1] += duration
+    timing[2] = max(timing[2], duration)
+
+
+def enable(trace_path=None):
+    """starts profiling, the trace and summary are written when the process exits."""
+    global _profiler
+    if _profiler is not None:
+        return _profiler
+    _profiler = Profiler(trace_path or app_file(TRACE_FILE))
+    _profiler.wrap_fs()
+    atexit.register(disable)
+    record_pyinstaller_unpack()
+    return _profiler
+
+
+def disable():
+    global _profiler
+    if _profiler is not None:
+        profiler, _profiler = _profiler, None
+        profiler.close()
+
+
+def enable_from_args(argv):
+    """
+    enables profiling if --profile[=trace path] is in argv (it is removed from argv) or SCFH_PROFILE is set.
+    :return: True if profiling is enabled
+    """
+    trace_path = None
+    requested = False
+    for arg in list(argv[1:]):
+        if arg == PROFILE_FLAG or arg.startswith(PROFILE_FLAG + "="):
+            requested = True
+            trace_path = arg.partition("=")[2] or None
+            argv.remove(arg)
+    env_value = os.environ.get(PROFILE_ENV, "")
+    if env_value and env_value.lower() not in ("0", "false", "no"):
+        requested = True
+        if trace_path is None and env_value not in ("1", "true", "yes"):
+            trace_path = env_value
+    if requested:
+        enable(trace_path)
+    return requested
+
+
+def record_pyinstaller_unpack():
+    """
+    the one-file exe unpacks itself into sys._MEIPASS before any Python code runs,
+    the time since that folder was created is the closest measure of the unpack (and interpreter start).
+    """
+    unpack_folder = getattr(sys, "_MEIPASS", None)
+    if unpack_folder is None:
+        return
+    try:
+        created = os.stat(unpack_folder).st_ctime
+    except OSError:
+        return
+    record("pyinstaller.unpack", max(0.0, time.time() - created))
@@ -0,0 +1,300 @@
+import os
+import sqlite3
+import time
+
+from categories import scan_categories
+from profiling import span
+from settings import app_file
+
+PROJECT_INDEX_FILE = "project_index.db"  # SQLite index of every project under the main folder, next to the executable
+INNER_FOLDERS = ("Recordings", "Pictures")  # folders of the default template, modes are found inside them
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS categories (
+    path TEXT PRIMARY KEY,
+    main_folder TEXT NOT NULL,
+    mtime REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS projects (
+    path TEXT PRIMARY KEY,
+    main_folder TEXT NOT NULL,
+    category TEXT NOT NULL,
+    category_path TEXT NOT NULL,
+    name TEXT NOT NULL,
+    name_key TEXT NOT NULL,
+    created REAL,
+    modes TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS projects_by_name ON projects (main_folder, name_key);
+CREATE INDEX IF NOT EXISTS projects_by_category ON projects (category_path);
+CREATE TABLE IF NOT EXISTS archives (
+    path TEXT PRIMARY KEY,
+    main_folder TEXT NOT NULL,
+    category TEXT NOT NULL,
+    category_path TEXT NOT NULL,
+    name TEXT NOT NULL,
+    name_key TEXT NOT NULL,
+    archived REAL NOT NULL,
+    size INTEGER NOT NULL,
+    original_size INTEGER NOT NULL,
+    files INTEGER NOT NULL,
+    sha256 TEXT NOT NULL,
+    modes TEXT NOT NULL
+);
+"""
+
+MODES_SEPARATOR = "\n"  # modes are stored as a single text column
+
+
+class ProjectRecord:
+    """A project found under the main folder."""
+    def __init__(self, path, category, category_path, name, created, modes):
+        self.path:str = path
+        self.category:str = category
+        self.category_path:str = category_path
+        self.name:str = name
+        self.created = created  # timestamp, None if unknown
+        self.modes:list = modes
+
+
+class ArchiveRecord:
+    """A project that has been archived into a single compressed file in its category, see archive.py."""
+    def __init__(self, path, category, category_path, name, archived, size, original_size, files, sha256, modes):
+        self.path:str = path  # the archive file
+        self.category:str = category
+        self.category_path:str = category_path
+        self.name:str = name
+        self.archived:float = archived  # timestamp
+        self.size:int = size  # of the archive
+        self.original_size:int = original_size  # of the project folder
+        self.files:int = files
+        self.sha256:str = sha256  # of the archive file, checked before a restore
+        self.modes:list = modes
+
+    @property
+    def project_path(self):
+        """where the project was, and is restored to."""
+        return os.path.join(self.category_path, self.name)
+
+
+def name_key(name):
+    """project names are compared case insensitive, like Windows compares folder names."""
+    return name.strip().casefold()
+
+
+def creation_time(stat_result):
+    """creation time on Windows, birth time where available, else the last metadata change."""
+    return getattr(stat_result, "st_birthtime", stat_result.st_ctime)
+
+
+def find_modes(project_path):
+    """
+    the modes of a project: the folders inside Recordings and Pictures,
+    or the folders inside the project when it has neither (Modes only template).
+    """
+    modes = {}  # dict as an ordered set
+    found_inner_folder = False
+    for inner_folder in INNER_FOLDERS:
+        try:
+            with os.scandir(os.path.join(project_path, inner_folder)) as entries:
+                found_inner_folder = True
+                for entry in entries:
+                    if entry.is_dir():
+                        modes.setdefault(entry.name, None)
+        except OSError:
+            continue
+    if not found_inner_folder:
+        try:
+            with os.scandir(project_path) as entries:
+                for entry in entries:
+                    if entry.is_dir():
+                        modes.setdefault(entry.name, None)
+        except OSError:
+            pass
+    return list(modes)
+
+
+def scan_projects(category_name, category_path):
+    """lists the projects of a single category in one os.scandir pass."""
+    projects = []
+    with os.scandir(category_path) as entries:
+        for entry in entries:
+            if not entry.is_dir():
+                continue
+            projects.append(ProjectRecord(entry.path, category_name, category_path, entry.name,
+                                          creation_time(entry.stat()), find_modes(entry.path)))
+    return projects
+
+
+class ProjectIndex:
+    """
+    A persistent SQLite index of every project under the main folder.
+    update() only re-scans categories whose mtime has changed (a project was added, removed or renamed),
+    so a launch does not walk the whole share.
+    names are also kept in memory, so duplicate names are found instantly while typing.
+    each method opens its own connection, so update() can run in a worker thread.
+    """
+    def __init__(self, main_folder, db_file=None):
+        self.main_folder:str = main_folder
+        self.db_file:str = db_file or app_file(PROJECT_INDEX_FILE)
+        self.by_name:dict = {}  # name key -> list of ProjectRecord
+        self.archived_by_name:dict = {}  # name key -> list of ArchiveRecord
+
+    def connect(self):
+        connection = sqlite3.connect(self.db_file)
+        connection.executescript(SCHEMA)
+        return connection
+
+    def load(self):
+        """loads the index of the last update into memory, does not touch the share."""
+        by_name = {}
+        try:
+            connection = self.connect()
+            try:
+                rows = connection.execute("SELECT path, category, category_path, name, created, modes FROM projects "
+                                          "WHERE main_folder = ?", (self.main_folder,)).fetchall()
+                archive_rows = connection.execute("SELECT path, category, category_path, name, archived, size, "
+                                                  "original_size, files, sha256, modes FROM archives "
+                                                  "WHERE main_folder = ?", (self.main_folder,)).fetchall()
+            finally:
+                connection.close()
+        except sqlite3.Error:
+            return  # the index is only a helper, the app works without it
+        for path, category, category_path, name, created, modes in rows:
+            record = ProjectRecord(path, category, category_path, name, created,
+                                   modes.split(MODES_SEPARATOR) if modes else [])
+            by_name.setdefault(name_key(name), []).append(record)
+        self.by_name = by_name
+        archived_by_name = {}
+        for row in archive_rows:
+            record = ArchiveRecord(*row[:-1], row[-1].split(MODES_SEPARATOR) if row[-1] else [])
+            archived_by_name.setdefault(name_key(record.name), []).append(record)
+        self.archived_by_name = archived_by_name
+
+    def update(self):
+        """
+        re-scans the categories that have changed since the last update, and forgets removed categories.
+        modes found in a project are refreshed when its category is re-scanned, or by refresh_project.
+        :return: number of re-scanned categories
+        """
+        with span("project_index.update"):
+            return self._update()
+
+    def _update(self):
+        categories = scan_categories(self.main_folder)
+        connection = self.connect()
+        rescanned = 0
+        try:
+            known = dict(connection.execute("SELECT path, mtime FROM categories WHERE main_folder = ?",
+                                            (self.main_folder,)).fetchall())
+            for category_path in set(known) - set(categories.values()):  # removed categories
+                with connection:
+                    connection.execute("DELETE FROM categories WHERE path = ?", (category_path,))
+                    connection.execute("DELETE FROM projects WHERE category_path = ?", (category_path,))
+            for category, category_path in categories.items():
+                try:
+                    mtime = os.stat(category_path).st_mtime
+                    if known.get(category_path) == mtime:
+                        continue
+                    projects = scan_projects(category, category_path)
+                except OSError:
+                    continue  # category removed while scanning, it will be forgotten next time
+                with connection:  # one transaction per category
+                    connection.execute("DELETE FROM projects WHERE category_path = ?", (category_path,))
+                    connection.executemany("INSERT OR REPLACE INTO projects VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                                           [self.row(project) for project in projects])
+                    connection.execute("INSERT OR REPLACE INTO categories VALUES (?, ?, ?)",
+                                       (category_path, self.main_folder, mtime))
+                rescanned += 1
+        finally:
+            connection.close()
+        self.load()
+        return rescanned
+
+    def row(self, project):
+        return (project.path, self.main_folder, project.category, project.category_path, project.name,
+                name_key(project.name), project.created, MODES_SEPARATOR.join(project.modes))
+
+    def refresh_project(self, project):
+        """re-reads the modes of a single project, before it is reopened."""
+        project.modes = find_modes(project.path)
+        self.save_project(project)
+        return project
+
+    def add_project(self, project_path, modes):
+        """records a project that has just been created, without waiting for the next update."""
+        category_path = os.path.dirname(project_path)
+        project = ProjectRecord(project_path, os.path.basename(category_path), category_path,
+                                os.path.basename(project_path), time.time(), list(modes))
+        self.save_project(project)
+        return project
+
+    def save_project(self, project):
+        records = self.by_name.setdefault(name_key(project.name), [])
+        records[:] = [record for record in records if record.path != project.path] + [project]
+        try:
+            connection = self.connect()
+            try:
+                with connection:
+                    connection.execute("INSERT OR REPLACE INTO projects VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                                       self.row(project))
+            finally:
+                connection.close()
+        except sqlite3.Error:
+            pass  # picked up by the next update
+
+    def find(self, project_name):
+        """projects with the same name in any category, instant (in memory)."""
+        return list(self.by_name.get(name_key(project_name), []))
+
+    def find_archived(self, project_name):
+        """archived projects with the same name in any category."""
+        return list(self.archived_by_name.get(name_key(project_name), []))
+
+    def archives(self, category_path):
+        """the archived projects of a category, sorted by name."""
+        return sorted((record for records in self.archived_by_name.values() for record in records
+                       if os.path.normcase(record.category_path) == os.path.normcase(category_path)),
+                      key=lambda record: record.name)
+
+    def add_archive(self, record):
+        """
+        records an archived project, its folder is no longer a project of the index.
+        unlike projects, archives are not found by update(), so the record must be saved before the folder is removed.
+        :return: True if the archive has been saved in the index
+        """
+        key = name_key(record.name)
+        try:
+            connection = self.connect()
+            try:
+                with connection:
+                    connection.execute("DELETE FROM projects WHERE path = ?", (record.project_path,))
+                    connection.execute("INSERT OR REPLACE INTO archives VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                                       (record.path, self.main_folder, record.category, record.category_path,
+                                        record.name, key, record.archived, record.size, record.original_size,
+                                        record.files, record.sha256, MODES_SEPARATOR.join(record.modes)))
+            finally:
+                connection.close()
+        except sqlite3.Error:
+            return False
+        self.by_name[key] = [project for project in self.by_name.get(key, [])
+                             if project.path != record.project_path]
+        archives = self.archived_by_name.setdefault(key, [])
+        archives[:] = [archive for archive in archives if archive.path != record.path] + [record]
+        return True
+
+    def remove_archive(self, record):
+        """forgets a restored archive, the restored folder is recorded as a project again."""
+        key = name_key(record.name)
+        self.archived_by_name[key] = [archive for archive in self.archived_by_name.get(key, [])
+                                      if archive.path != record.path]
+        try:
+            connection = self.connect()
+            try:
+                with connection:
+                    connection.execute("DELETE FROM archives WHERE path = ?", (record.path,))
+            finally:
+                connection.close()
+        except sqlite3.Error:
+            pass  # the archive file is gone, a restore of the stale record fails without touching anything
+        self.add_project(record.project_path, record.modes)
@@ -0,0 +1,147 @@
+import errno
+import json
+import os
+import time
+
+from folder_plan import UNCATEGORIZED_FOLDER
+from profiling import span
+from settings import app_file, atomic_write
+
+JOURNAL_FILE = "recategorize_journal.jsonl"  # next to the executable, one line per moved project
+
+# Moves projects out of the uncategorized folder into categories.
+# every move is a single os.rename inside the main directory (same volume, nothing is copied),
+# a project whose name already exists in the target category, or that cannot be renamed, is reported and left in place.
+# each successful move is written to the journal right away, so the last batch can be undone even after a crash.
+
+
+class MoveReport:
+    def __init__(self):
+        self.moved:list = []  # (source, destination)
+        self.conflicts:list = []  # (source, destination, reason)
+        self.cancelled:bool = False
+
+
+def list_uncategorized(main_folder):
+    """
+    :return: dict, key: project name, value: project path, of the projects in the uncategorized folder. sorted by name.
+    """
+    try:
+        with os.scandir(os.path.join(main_folder, UNCATEGORIZED_FOLDER)) as entries:
+            projects = [(entry.name, entry.path) for entry in entries if entry.is_dir()]
+    except FileNotFoundError:
+        return {}  # nothing was ever created without a category
+    projects.sort()
+    return dict(projects)
+
+
+def plan_moves(project_paths, category_path):
+    """:return: list of (source, destination) moving every project into category_path, under the same name."""
+    return [(path, os.path.join(category_path, os.path.basename(path))) for path in project_paths
+            if os.path.normcase(os.path.dirname(path)) != os.path.normcase(category_path)]
+
+
+def move_reason(error):
+    if isinstance(error, FileExistsError) or error.errno in (errno.EEXIST, errno.ENOTEMPTY):
+        return "a project with this name already exists in the category"
+    if isinstance(error, FileNotFoundError):
+        return "the project or the category no longer exists"
+    if error.errno == errno.EXDEV or getattr(error, "winerror", None) == 17:  # ERROR_NOT_SAME_DEVICE
+        return "the category is on another drive, move it by hand"
+    if isinstance(error, PermissionError):
+        return "the project is in use or access is denied"
+    return str(error)
+
+
+def rename_all(moves, journal=None, batch=None, progress=None, cancel_event=None):
+    """
+    renames every (source, destination), never over an existing folder.
+    :param journal: MoveJournal, successful moves are recorded under batch
+    :param progress: called with (done, total)
+    :return: MoveReport
+    """
+    report = MoveReport()
+    for done, (source, destination) in enumerate(moves, start=1):
+        if cancel_event is not None and cancel_event.is_set():
+            report.cancelled = True
+            break
+        if os.path.exists(destination):  # os.rename replaces an empty folder on Linux
+            report.conflicts.append((source, destination, move_reason(FileExistsError())))
+        else:
+            try:
+                os.rename(source, destination)
+            except OSError as error:
+                report.conflicts.append((source, destination, move_reason(error)))
+            else:
+                report.moved.append((source, destination))
+                if journal is not None:
+                    journal.add(batch, source, destination)
+        if progress is not None:
+            progress((done, len(moves)))
+    return report
+
+
+class MoveJournal:
+    """the moves of every batch, so a batch can be undone."""
+    def __init__(self, path=None):
+        self.path:str = path or app_file(JOURNAL_FILE)
+
+    def add(self, batch, source, destination):
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"batch": batch, "source": source, "destination": destination},
+                               ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def entries(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                lines = f.readlines()
+        except OSError:
+            return []
+        entries = []
+        for line in lines:
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                continue  # a line cut by a crash, its move never finished
+        return entries
+
+    def last_batch(self):
+        """:return: (batch id, list of (source, destination)) of the last batch, (None, []) if there is none"""
+        entries = self.entries()
+        if not entries:
+            return None, []
+        batch = entries[-1]["batch"]
+        return batch, [(entry["source"], entry["destination"]) for entry in entries if entry["batch"] == batch]
+
+    def forget(self, batch, moves):
+        """removes the undone moves of a batch, the journal is rewritten atomically (see atomic_write)."""
+        undone = set(moves)
+        kept = [entry for entry in self.entries()
+                if entry["batch"] != batch or (entry["source"], entry["destination"]) not in undone]
+        atomic_write(self.path, lambda f: f.writelines(json.dumps(entry, ensure_ascii=False) + "\n" for entry in kept),
+                     ".recategorize-")
+
+
+def move_projects(moves, journal=None, progress=None, cancel_event=None):
+    """moves projects into their categories as one batch of the journal. :return: MoveReport"""
+    journal = journal or MoveJournal()
+    with span("recategorize.move"):
+        return rename_all(moves, journal, f"{time.time():.6f}", progress, cancel_event)
+
+
+def undo_last_batch(journal=None, progress=None):
+    """
+    moves the projects of the last batch back, the last move first.
+    moves that cannot be undone (e.g. the name is taken again) are reported and kept in the journal.
+    :return: MoveReport of the undo
+    """
+    journal = journal or MoveJournal()
+    batch, moves = journal.last_batch()
+    if batch is None:
+        return MoveReport()
+    with span("recategorize.undo"):
+        report = rename_all([(destination, source) for source, destination in reversed(moves)], progress=progress)
+    journal.forget(batch, [(source, destination) for destination, source in report.moved])
+    return report
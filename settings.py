@@ -0,0 +1,114 @@
+import json
+import os
+import sys
+import tempfile
+
+SETTINGS_FILE = "settings.json"  # next to the executable, see app_file
+LEGACY_CONFIG_FILE = "config.txt"  # older versions kept only the main directory in here
+DEFAULT_MAIN_FOLDER = "C:/Users/User/Desktop/Iron Swords War"  # like in the StormCase laptop
+DEFAULTS = {"main_folder": DEFAULT_MAIN_FOLDER,
+            "staged_creation": False}  # build new projects in a hidden folder and publish them at once
+
+
+def app_dir():
+    """
+    the folder of the executable (packed app) or of the scripts (running from source).
+    files are looked up here instead of the working directory, so a shortcut started elsewhere still finds them.
+    """
+    if getattr(sys, "frozen", False):  # PyInstaller
+        return os.path.dirname(sys.executable)
+    return os.path.dirname(os.path.abspath(__file__))
+
+
+def app_file(name):
+    """path of a file next to the executable."""
+    return os.path.join(app_dir(), name)
+
+
+def atomic_write(path, write, prefix=".tmp-"):
+    """
+    writes a text file atomically: a temp file in the same folder is filled, synced and renamed over path,
+    so a crash or a concurrent reader never sees a half written file.
+    :param write: called with the open temp file, writes the whole content
+    """
+    folder = os.path.dirname(path) or "."
+    fd, temp_path = tempfile.mkstemp(prefix=prefix, suffix=".tmp", dir=folder)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)  # atomic on Windows and Linux
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+class Settings:
+    """
+    The settings of the app, loaded once and shared by all components (see get_settings).
+    every change is written atomically (see atomic_write): a temp file is renamed over settings.json,
+    so a crash while saving never leaves a half written file.
+    components subscribe to a key and are notified when it changes, e.g. a new main directory
+    re-scans the categories without a restart.
+    """
+    def __init__(self, path=None):
+        self.path:str = path or app_file(SETTINGS_FILE)
+        self._values:dict = dict(DEFAULTS)
+        self._subscribers:dict = {}  # key -> list of callbacks
+        self.load()
+
+    def load(self):
+        """
+        reads settings.json, or the main directory from an old config.txt if there are no settings yet.
+        to prevent saving an empty directory, an empty main directory is ignored.
+        """
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                values = json.load(f)
+        except (OSError, ValueError):
+            values = self.load_legacy_config()
+        if isinstance(values, dict):
+            self._values.update({key: value for key, value in values.items() if value not in ("", None)})
+
+    def load_legacy_config(self):
+        config_file = os.path.join(os.path.dirname(self.path), LEGACY_CONFIG_FILE)
+        try:
+            with open(config_file, "r", encoding="utf-8") as f:
+                saved_path = f.read().strip()
+        except OSError:
+            return {}
+        return {"main_folder": saved_path}
+
+    def get(self, key):
+        return self._values.get(key, DEFAULTS.get(key))
+
+    def set(self, key, value):
+        """saves a setting and notifies its subscribers, does nothing if the value has not changed."""
+        if self._values.get(key) == value:
+            return
+        self._values[key] = value
+        self.save()
+        for callback in list(self._subscribers.get(key, [])):
+            callback(value)
+
+    def subscribe(self, key, callback):
+        """callback(new value) is called after key changes."""
+        self._subscribers.setdefault(key, []).append(callback)
+
+    def save(self):
+        atomic_write(self.path, lambda f: json.dump(self._values, f, ensure_ascii=False, indent=2), ".settings-")
+
+
+_settings = None
+
+
+def get_settings():
+    """the single settings object of the app, loaded on first use."""
+    global _settings
+    if _settings is None:
+        _settings = Settings()
+    return _settings
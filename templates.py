@@ -0,0 +1,199 @@
+import functools
+import os
+import re
+import string
+import sys
+
+from settings import app_file
+
+TEMPLATES_FILE = "templates.txt"  # loaded from next to the executable, see settings.app_file and templates_file
+DATE_FORMAT = "%Y-%m-%d"  # {date} placeholder
+PLACEHOLDERS = ("project", "mode", "date")
+INVALID_CHARACTERS = re.compile(r'[<>:"|?*]')  # not allowed in Windows folder names
+TEMPLATE_HEADER = re.compile(r"^\[(.+)\]$")
+
+# Template file format:
+#   # comment
+#   [Template Name]
+#   Recordings/{mode}
+#   Pictures/{mode}
+# every line below a [Template Name] header is a folder inside the project, parent folders are created too.
+# {mode} creates the line once per mode, {project} is the project name, {date} is today's date.
+# a line with {mode} still creates its folders before the {mode} part when there are no modes.
+
+DEFAULT_TEMPLATE_NAME = "Recordings and Pictures"
+MODES_ONLY_TEMPLATE_NAME = "Modes only"
+BUILTIN_TEMPLATES = {DEFAULT_TEMPLATE_NAME: ["Recordings/{mode}", "Pictures/{mode}"],
+                     MODES_ONLY_TEMPLATE_NAME: ["{mode}"]}
+
+
+class TemplateError(ValueError):
+    """raised when a template line is invalid, tells the template name and line."""
+
+
+class FolderTemplate:
+    """
+    A compiled folder-tree template.
+    every line is parsed and validated once, into segments of (literal, placeholder) parts,
+    expanding it for a project only fills in the placeholders.
+    """
+    def __init__(self, name, lines):
+        self.name:str = name
+        self.lines:list = [compile_line(name, line) for line in lines]  # list of segments per line
+        self._expand = functools.lru_cache(maxsize=32)(self._expand_tree)  # same modes -> same tree, no re-expansion
+
+    def expand(self, project_name, modes, date):
+        """
+        :param project_name: the project name
+        :param modes: mode names, in order
+        :param date: the {date} value
+        :return: tuple of relative folder paths (tuples of names), parents always before their children
+        """
+        return self._expand(project_name, tuple(modes), date)
+
+    def _expand_tree(self, project_name, modes, date):
+        values = {"project": project_name, "date": date}
+        tree = {}  # dict as an ordered set
+        for segments in self.lines:
+            mode_index = first_mode_segment(segments)
+            if mode_index is None:
+                add_with_parents(tree, [fill(segment, values) for segment in segments])
+                continue
+            add_with_parents(tree, [fill(segment, values) for segment in segments[:mode_index]])
+            for mode in modes:
+                values["mode"] = mode
+                add_with_parents(tree, [fill(segment, values) for segment in segments])
+            values.pop("mode", None)
+        return tuple(tree)
+
+
+def compile_line(template_name, line):
+    """
+    splits a template line into folders, and each folder into (literal, placeholder) parts.
+    :raises TemplateError: absolute paths, '..', empty folders, unknown placeholders or invalid characters
+    """
+    line = line.strip()
+    if os.path.isabs(line) or line.startswith(("/", "\\")) or re.match(r"^[A-Za-z]:", line):
+        raise TemplateError(f"{template_name}: '{line}' must be relative to the project folder")
+    segments = []
+    for folder in re.split(r"[/\\]", line):
+        folder = folder.strip()
+        if folder in ("", ".", ".."):
+            raise TemplateError(f"{template_name}: '{line}' has an empty, '.' or '..' folder")
+        parts = []
+        try:
+            parsed = list(string.Formatter().parse(folder))
+        except ValueError as error:
+            raise TemplateError(f"{template_name}: '{line}' {error}") from error
+        for literal, field, format_spec, conversion in parsed:
+            if INVALID_CHARACTERS.search(literal):
+                raise TemplateError(f"{template_name}: '{line}' has a character that is not allowed in folder names")
+            if field is not None and (field not in PLACEHOLDERS or format_spec or conversion):
+                raise TemplateError(f"{template_name}: '{line}' unknown placeholder {{{field}}}, "
+                                    f"use {', '.join('{' + p + '}' for p in PLACEHOLDERS)}")
+            parts.append((literal, field))
+        segments.append(tuple(parts))
+    return tuple(segments)
+
+
+def first_mode_segment(segments):
+    """index of the first folder that uses {mode}, None if the line does not use it."""
+    for index, segment in enumerate(segments):
+        if any(field == "mode" for literal, field in segment):
+            return index
+    return None
+
+
+def fill(segment, values):
+    return "".join(literal + (values[field] if field is not None else "") for literal, field in segment)
+
+
+def add_with_parents(tree, folders):
+    for depth in range(1, len(folders) + 1):
+        tree.setdefault(tuple(folders[:depth]), None)
+
+
+def parse_templates(text):
+    """
+    parses the template file text.
+    :return: (dict of template name -> FolderTemplate, list of error messages of invalid templates)
+    """
+    raw = {}
+    order = []
+    current = None
+    for line_number, line in enumerate(text.splitlines(), start=1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        header = TEMPLATE_HEADER.match(line)
+        if header:
+            current = header.group(1).strip()
+            if current not in raw:
+                order.append(current)
+                raw[current] = []
+            continue
+        if current is None:
+            raise TemplateError(f"line {line_number}: folder '{line}' is not under a [Template Name]")
+        raw[current].append(line)
+
+    templates = {}
+    errors = []
+    for name in order:
+        if not raw[name]:
+            errors.append(f"{name}: template has no folders")
+            continue
+        try:
+            templates[name] = FolderTemplate(name, raw[name])
+        except TemplateError as error:
+            errors.append(str(error))  # one invalid template does not hide the others
+    return templates, errors
+
+
+_compiled_cache:dict = {}  # template file path -> (mtime, templates, errors)
+
+
+def templates_file():
+    """
+    templates.txt next to the executable, so the user can edit it.
+    if there is none, the copy packed into the exe (spec datas, unpacked into sys._MEIPASS) is used.
+    """
+    path = app_file(TEMPLATES_FILE)
+    unpack_folder = getattr(sys, "_MEIPASS", None)
+    if unpack_folder and not os.path.isfile(path):
+        return os.path.join(unpack_folder, TEMPLATES_FILE)
+    return path
+
+
+def load_templates(path=None):
+    """
+    loads the built-in templates and the templates of the template file.
+    the file is compiled once and reused until it changes (by mtime).
+    :param path: template file, templates.txt next to the executable (or packed into it) by default
+    :return: (dict of template name -> FolderTemplate, list of error messages)
+    """
+    path = path or templates_file()
+    templates = builtin_templates()
+    try:
+        mtime = os.stat(path).st_mtime
+    except OSError:
+        return templates, []  # no template file, built-in templates only
+    cached = _compiled_cache.get(path)
+    if cached is None or cached[0] != mtime:
+        try:
+            with open(path, "r", encoding="utf-8-sig") as f:
+                file_templates, errors = parse_templates(f.read())
+        except (OSError, UnicodeDecodeError, TemplateError) as error:
+            file_templates, errors = {}, [str(error)]
+        cached = (mtime, file_templates, errors)
+        _compiled_cache[path] = cached
+    templates.update(cached[1])
+    return templates, list(cached[2])
+
+
+@functools.lru_cache(maxsize=None)
+def _builtin_templates():
+    return {name: FolderTemplate(name, lines) for name, lines in BUILTIN_TEMPLATES.items()}
+
+
+def builtin_templates():
+    return dict(_builtin_templates())
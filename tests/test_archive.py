@@ -0,0 +1,97 @@
+import os
+import tarfile
+import tempfile
+import unittest
+
+from archive import ArchiveError, archive_project, restore_project
+from project_index import ProjectIndex
+
+
+class ArchiveTest(unittest.TestCase):
+    def setUp(self):
+        self.temp = tempfile.TemporaryDirectory()
+        self.main_folder = os.path.join(self.temp.name, "Iron Swords War")
+        self.category = os.path.join(self.main_folder, "Antennas")
+        self.project = os.path.join(self.category, "Site A")
+        self.files = {os.path.join("Recordings", "Mode1", "capture.wav"): os.urandom(300000) + bytes(200000),
+                      os.path.join("Pictures", "Mode1", "photo.jpg"): b"jpeg" * 1000}
+        for relative, data in self.files.items():
+            os.makedirs(os.path.dirname(os.path.join(self.project, relative)), exist_ok=True)
+            with open(os.path.join(self.project, relative), "wb") as f:
+                f.write(data)
+        os.makedirs(os.path.join(self.project, "Recordings", "Empty Mode"))
+        self.index = ProjectIndex(self.main_folder, os.path.join(self.temp.name, "index.db"))
+
+    def tearDown(self):
+        self.temp.cleanup()
+
+    def test_round_trip(self):
+        record, leftovers = archive_project(self.project, self.index, workers=1)
+        self.assertEqual(leftovers, [])
+        self.assertFalse(os.path.exists(self.project))
+        self.assertEqual((record.files, record.modes), (2, ["Mode1", "Empty Mode"]))
+        with tarfile.open(record.path, "r:gz") as tar:  # a standard .tar.gz
+            self.assertIn("Site A/Recordings/Mode1/capture.wav", tar.getnames())
+
+        reloaded = ProjectIndex(self.main_folder, self.index.db_file)
+        reloaded.load()
+        [archived] = reloaded.archives(self.category)
+        self.assertEqual(archived.sha256, record.sha256)
+        self.assertEqual(reloaded.find_archived("site a")[0].path, record.path)
+
+        restore_project(archived)
+        reloaded.remove_archive(archived)
+        for relative, data in self.files.items():
+            with open(os.path.join(self.project, relative), "rb") as f:
+                self.assertEqual(f.read(), data)
+        self.assertTrue(os.path.isdir(os.path.join(self.project, "Recordings", "Empty Mode")))
+        self.assertFalse(os.path.exists(record.path))
+        self.assertEqual(reloaded.archives(self.category), [])
+        self.assertEqual(sorted(os.listdir(self.category)), ["Site A"])
+
+    def test_project_with_links_is_kept(self):
+        recording = os.path.join(self.project, "Recordings", "Mode1", "capture.wav")
+        for link, make_link in (("symlink.wav", os.symlink), ("hardlink.wav", os.link)):
+            with self.subTest(link=link):
+                path = os.path.join(self.project, "Recordings", "Mode1", link)
+                try:
+                    make_link(recording, path)
+                except (OSError, NotImplementedError):
+                    self.skipTest(f"{link} cannot be created here")
+                with self.assertRaises(ArchiveError):  # it could never be restored
+                    archive_project(self.project, self.index, workers=1)
+                self.assertTrue(os.path.isfile(recording))
+                self.assertEqual(os.listdir(self.category), ["Site A"])
+                self.assertEqual(self.index.archives(self.category), [])
+                os.remove(path)
+
+    def test_existing_archive_is_not_replaced(self):
+        with open(self.project + ".tar.gz", "wb") as f:
+            f.write(b"another archive")
+        with self.assertRaises(ArchiveError):
+            archive_project(self.project, self.index, workers=1)
+        self.assertTrue(os.path.isdir(self.project))
+
+    def test_project_is_kept_when_the_index_cannot_be_written(self):
+        index = ProjectIndex(self.main_folder, os.path.join(self.temp.name, "missing folder", "index.db"))
+        with self.assertRaises(ArchiveError):
+            archive_project(self.project, index, workers=1)
+        self.assertTrue(os.path.isdir(self.project))
+        self.assertEqual(os.listdir(self.category), ["Site A"])
+
+    def test_changed_archive_is_not_restored(self):
+        record, leftovers = archive_project(self.project, self.index, workers=1)
+        with open(record.path, "r+b") as f:
+            f.seek(-20, os.SEEK_END)
+            byte = f.read(1)
+            f.seek(-20, os.SEEK_END)
+            f.write(bytes([byte[0] ^ 0xFF]))
+        with self.assertRaises(ArchiveError):
+            restore_project(record)
+        self.assertFalse(os.path.exists(self.project))
+        self.assertTrue(os.path.exists(record.path))
+        self.assertEqual(os.listdir(self.category), ["Site A.tar.gz"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stderr
+
+from batch import main, run_batch
+
+
+class BatchTest(unittest.TestCase):
+    def setUp(self):
+        self.temp = tempfile.TemporaryDirectory()
+        self.main_folder = os.path.join(self.temp.name, "Iron Swords War")
+        os.makedirs(os.path.join(self.main_folder, "Antennas"))
+        self.templates = os.path.join(self.temp.name, "no templates.txt")  # built-in templates only
+
+    def tearDown(self):
+        self.temp.cleanup()
+
+    def manifest(self, name, text, encoding="utf-8"):
+        path = os.path.join(self.temp.name, name)
+        with open(path, "w", encoding=encoding, newline="") as f:
+            f.write(text)
+        return path
+
+    def jsonl(self, *rows):
+        return self.manifest("manifest.jsonl", "\n".join(row if isinstance(row, str) else json.dumps(row)
+                                                         for row in rows))
+
+    def run_manifest(self, path):
+        out = io.StringIO()
+        failed = run_batch(path, self.main_folder, out=out, templates_file=self.templates)
+        return failed, out.getvalue().splitlines()
+
+    def test_csv_manifest(self):
+        path = self.manifest("manifest.csv", "project,category,modes,inner_folders,template\n"
+                                             "Site A,Antennas,Mode1;Mode2,1,\n"
+                                             "Site B,,Mode1,no,\n")
+        failed, lines = self.run_manifest(path)
+        self.assertEqual(failed, 0)
+        self.assertTrue(os.path.isdir(os.path.join(self.main_folder, "Antennas", "Site A", "Pictures", "Mode2")))
+        uncategorized = [name for name in os.listdir(self.main_folder) if name != "Antennas"]
+        self.assertEqual(len(uncategorized), 1)
+        self.assertTrue(os.path.isdir(os.path.join(self.main_folder, uncategorized[0], "Site B", "Mode1")))
+        self.assertEqual(lines[-1], "2 of 2 projects created.")
+
+    def test_invalid_rows_fail_and_the_rest_is_created(self):
+        path = self.jsonl({"project": 123}, {"project": "P", "category": 5}, {"project": "P", "template": 5},
+                          {"project": "P", "modes": 5}, {"project": "P", "modes": ["Mode1", 2]},
+                          {"project": "P", "category": "Missing"}, {"project": "P", "template": "Missing"},
+                          {"project": "P", "inner_folders": "maybe"}, "not json", "[1, 2]",
+                          {"project": "Site A", "category": "Antennas", "modes": ["Mode1"]})
+        failed, lines = self.run_manifest(path)
+        self.assertEqual(failed, 10)
+        self.assertEqual([line.split(":")[0] for line in lines if "FAILED" in line],
+                         [f"row {number}" for number in range(1, 11)])
+        self.assertIn("row 11: OK", lines[-2])
+        self.assertEqual(lines[-1], "1 of 11 projects created.")
+        self.assertEqual(os.listdir(os.path.join(self.main_folder, "Antennas")), ["Site A"])
+
+    def test_category_outside_the_main_folder_is_rejected(self):
+        path = self.jsonl(*({"project": "P", "category": category}
+                            for category in ("..", "Antennas/..", os.path.abspath(self.temp.name), "a\\b")))
+        failed, lines = self.run_manifest(path)
+        self.assertEqual(failed, 4)
+        self.assertEqual(sorted(os.listdir(self.temp.name)), ["Iron Swords War", "manifest.jsonl"])
+        self.assertEqual(os.listdir(os.path.join(self.main_folder, "Antennas")), [])
+
+    def test_unreadable_manifest_counts_as_failed(self):
+        path = self.manifest("manifest.csv", "project,category\nSite A,Antennas\nSite \xe9,Antennas\n" + "x" * 9000,
+                             encoding="latin-1")
+        failed, lines = self.run_manifest(path)
+        self.assertEqual(failed, 1)
+        self.assertIn("manifest could not be read", lines[-2])
+
+    def test_missing_manifest_is_a_usage_error(self):
+        with redirect_stderr(io.StringIO()), self.assertRaises(SystemExit) as caught:
+            main([os.path.join(self.temp.name, "missing.csv"), "--main-folder", self.main_folder])
+        self.assertEqual(caught.exception.code, 2)
+
+    def test_summary_file(self):
+        summary = os.path.join(self.temp.name, "summary.txt")
+        path = self.jsonl({"project": "Site A", "category": "Antennas"})
+        code = main([path, "--main-folder", self.main_folder, "--templates", self.templates, "--summary", summary,
+                     "--staged"])
+        self.assertEqual(code, 0)
+        with open(summary, encoding="utf-8") as f:
+            self.assertEqual(f.read().splitlines()[-1], "1 of 1 projects created.")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+import os
+import tempfile
+import unittest
+
+from categories import CategoryIndex, CategorySearch, scan_categories
+from folder_plan import STAGING_FOLDER
+
+
+class CategoryIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.temp = tempfile.TemporaryDirectory()
+        self.main_folder = os.path.join(self.temp.name, "Iron Swords War")
+        for category in ("Radars", "Antennas", STAGING_FOLDER):
+            os.makedirs(os.path.join(self.main_folder, category))
+        with open(os.path.join(self.main_folder, "notes.txt"), "w") as f:
+            f.write("not a category")
+        self.cache_file = os.path.join(self.temp.name, "categories_cache.json")
+
+    def tearDown(self):
+        self.temp.cleanup()
+
+    def test_scan_lists_sorted_category_folders(self):
+        self.assertEqual(list(scan_categories(self.main_folder)), ["Antennas", "Radars"])
+
+    def test_refresh_only_rescans_a_changed_main_folder(self):
+        index = CategoryIndex(self.main_folder, self.cache_file)
+        self.assertTrue(index.refresh())
+        self.assertFalse(index.refresh())
+
+        os.makedirs(os.path.join(self.main_folder, "Cameras"))
+        os.utime(self.main_folder, (1, 1))  # a new mtime, whatever the file system's resolution
+        self.assertTrue(index.refresh())
+        self.assertEqual(list(index.cat_dict), ["Antennas", "Cameras", "Radars"])
+
+    def test_cache(self):
+        CategoryIndex(self.main_folder, self.cache_file).refresh()
+        cached = CategoryIndex(self.main_folder, self.cache_file)
+        self.assertTrue(cached.load_cache())
+        self.assertEqual(list(cached.cat_dict), ["Antennas", "Radars"])
+        self.assertFalse(cached.refresh())  # nothing changed since the cache was written
+        self.assertEqual(sorted(os.listdir(self.temp.name)),
+                         ["Iron Swords War", "categories_cache.json"])  # no temp file is left behind
+
+        other = CategoryIndex(os.path.join(self.temp.name, "Other"), self.cache_file)
+        self.assertFalse(other.load_cache())  # the cache of another main folder
+        with open(self.cache_file, "w", encoding="utf-8") as f:
+            f.write('{"main_folder": ')
+        self.assertFalse(CategoryIndex(self.main_folder, self.cache_file).load_cache())
+
+
+class CategorySearchTest(unittest.TestCase):
+    def setUp(self):
+        self.search = CategorySearch(["Antennas", "Radars", "antenna tests", "Cameras", "Ground Radar"])
+
+    def test_prefix_matches_come_first(self):
+        self.assertEqual(self.search.search("rada"), ["Radars", "Ground Radar"])
+        self.assertEqual(self.search.search("ANT"), ["antenna tests", "Antennas"])
+
+    def test_empty_query_lists_everything_in_order(self):
+        self.assertEqual(self.search.search("  "), self.search.names)
+
+    def test_typing_narrows_and_deleting_widens(self):
+        for query, expected in (("a", ["Antennas", "antenna tests", "Radars", "Cameras", "Ground Radar"]),
+                                ("ar", ["Radars", "Ground Radar"]), ("ars", ["Radars"]), ("arz", []),
+                                ("ar", ["Radars", "Ground Radar"]), ("tests", ["antenna tests"])):
+            with self.subTest(query=query):
+                self.assertEqual(sorted(self.search.search(query)), sorted(expected))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from disk_usage import DiskUsage, format_activity, format_size
+
+
+class DiskUsageTest(unittest.TestCase):
+    def setUp(self):
+        self.temp = tempfile.TemporaryDirectory()
+        self.main_folder = os.path.join(self.temp.name, "Iron Swords War")
+        self.antennas = os.path.join(self.main_folder, "Antennas")
+        self.write(os.path.join(self.antennas, "Site A", "Recordings", "Mode1", "capture.wav"), 1000, 1700000000)
+        self.write(os.path.join(self.antennas, "Site A", "Pictures", "Mode1", "photo.jpg"), 200, 1700000500)
+        self.write(os.path.join(self.antennas, "Site B", "notes.txt"), 30, 1600000000)
+        self.write(os.path.join(self.antennas, "loose.txt"), 5, 1600000000)
+        os.makedirs(os.path.join(self.main_folder, "Radars"))
+        for folder, folders, files in os.walk(self.main_folder):
+            os.utime(folder, (1500000000, 1500000000))  # folder activity is older than the files
+        self.cache_file = os.path.join(self.temp.name, "disk_usage_cache.json")
+
+    def tearDown(self):
+        self.temp.cleanup()
+
+    def write(self, path, size, mtime):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(b"x" * size)
+        os.utime(path, (mtime, mtime))
+
+    def test_totals_per_category_and_project(self):
+        reported = []
+        results = DiskUsage(self.main_folder, self.cache_file).scan(lambda *result: reported.append(result[:2]))
+        antennas = results["Antennas"]
+        self.assertEqual((antennas.projects["Site A"].size, antennas.projects["Site A"].files), (1200, 2))
+        self.assertEqual(antennas.projects["Site A"].latest, 1700000500)
+        self.assertEqual((antennas.total.size, antennas.total.files), (1235, 4))
+        self.assertEqual((results["Radars"].total.size, results["Radars"].projects), (0, {}))
+        self.assertEqual(sorted(reported, key=str),
+                         sorted([("Antennas", None), ("Antennas", "Site A"), ("Antennas", "Site B"), ("Radars", None)],
+                                key=str))
+
+    def test_unchanged_folders_are_not_listed_again(self):
+        DiskUsage(self.main_folder, self.cache_file).scan()
+        cached = DiskUsage(self.main_folder, self.cache_file)
+        with mock.patch("os.scandir", wraps=os.scandir) as scandir:
+            results = cached.scan()
+        self.assertEqual(scandir.call_count, 1)  # the main folder, for its categories
+        self.assertEqual(results["Antennas"].total.size, 1235)
+
+        self.write(os.path.join(self.antennas, "Site B", "more.txt"), 70, 1600000000)
+        results = cached.scan()
+        self.assertEqual(results["Antennas"].projects["Site B"].size, 100)
+        self.assertEqual(sorted(os.listdir(self.temp.name)), ["Iron Swords War", "disk_usage_cache.json"])
+
+    def test_full_rescan_picks_up_files_rewritten_in_place(self):
+        usage = DiskUsage(self.main_folder, self.cache_file)
+        usage.scan()
+        path = os.path.join(self.antennas, "Site B", "notes.txt")
+        with open(path, "ab") as f:
+            f.write(b"x" * 70)
+        self.assertEqual(usage.scan()["Antennas"].projects["Site B"].size, 30)  # the folder's mtime has not changed
+        self.assertEqual(usage.scan(full=True)["Antennas"].projects["Site B"].size, 100)
+
+    def test_format(self):
+        self.assertEqual(format_size(512), "512 B")
+        self.assertEqual(format_size(1536), "1.5 KB")
+        self.assertEqual(format_size(3 * 1024 ** 4), "3.0 TB")
+        self.assertEqual(format_activity(0), "-")
+
+    def test_other_main_folder_ignores_the_cache(self):
+        DiskUsage(self.main_folder, self.cache_file).scan()
+        self.assertFalse(DiskUsage(os.path.join(self.temp.name, "Other"), self.cache_file).load_cache())
+        self.assertTrue(DiskUsage(self.main_folder, self.cache_file).load_cache())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,114 @@
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+from folder_plan import (CreationFailed, FolderPlan, InvalidNameError, ProjectExistsError, STAGING_FOLDER,
+                         UNCATEGORIZED_FOLDER, create_project, execute_plan, plan_project)
+from templates import DEFAULT_TEMPLATE_NAME, MODES_ONLY_TEMPLATE_NAME, builtin_templates
+
+
+class FolderPlanTest(unittest.TestCase):
+    def setUp(self):
+        self.temp = tempfile.TemporaryDirectory()
+        self.main_folder = os.path.join(self.temp.name, "Iron Swords War")
+        self.category = os.path.join(self.main_folder, "Antennas")
+        os.makedirs(self.category)
+        self.templates = builtin_templates()
+
+    def tearDown(self):
+        self.temp.cleanup()
+
+    def plan(self, name="Site A", modes=("Mode1", "Mode2"), category=None, template=DEFAULT_TEMPLATE_NAME):
+        return plan_project(self.main_folder, self.category if category is None else category, name, list(modes),
+                            self.templates[template])
+
+    def test_plan_is_parent_first_and_deduplicated(self):
+        plan = self.plan(modes=["Mode1", "Mode1", " "])
+        project = os.path.join(self.category, "Site A")
+        self.assertEqual(plan.nodes[0], project)
+        self.assertEqual(len(plan), 5)  # project, Recordings, Recordings/Mode1, Pictures, Pictures/Mode1
+        for node in plan.nodes[1:]:
+            self.assertIn(os.path.dirname(node), plan.nodes[:plan.nodes.index(node)])
+
+    def test_no_category_plans_the_uncategorized_folder(self):
+        plan = self.plan(category="", template=MODES_ONLY_TEMPLATE_NAME)
+        self.assertEqual(plan.nodes[0], os.path.join(self.main_folder, UNCATEGORIZED_FOLDER))
+        execute_plan(plan)
+        self.assertTrue(os.path.isdir(os.path.join(self.main_folder, UNCATEGORIZED_FOLDER, "Site A", "Mode2")))
+
+    def test_invalid_names_are_rejected(self):
+        for name, modes in (("../../escape", []), ("..", []), ("ok", ["a/b"]), ("ok", ["a\\b"]), ("ok", ["a:b"])):
+            with self.subTest(name=name, modes=modes):
+                with self.assertRaises(InvalidNameError):
+                    self.plan(name=name, modes=modes)
+
+    def test_execute_reports_existing_folders(self):
+        plan = self.plan()
+        first = execute_plan(plan)
+        second = execute_plan(plan)
+        self.assertEqual(len(first.created), len(plan))
+        self.assertEqual(second.created, [])
+        self.assertEqual(len(second.existed), len(plan))
+
+    def test_missing_category_is_created_but_nothing_outside_it(self):
+        plan = self.plan(category=os.path.join(self.main_folder, "New Category"))
+        report = execute_plan(plan)
+        self.assertIn(os.path.join(self.main_folder, "New Category"), report.created)
+
+        nested = FolderPlan(os.path.join(self.category, "Site B"))
+        nested.add(nested.project_path)
+        nested.add(os.path.join(nested.project_path, "Missing", "Nested"))  # its parent is not planned
+        with self.assertRaises(FileNotFoundError):
+            execute_plan(nested)
+        self.assertFalse(os.path.exists(os.path.join(nested.project_path, "Missing")))
+
+    def test_cancel_rolls_back(self):
+        cancel_event = threading.Event()
+        cancel_event.set()
+        plan = self.plan()
+        with self.assertRaises(CreationFailed) as caught:
+            create_project(plan, cancel_event=cancel_event)
+        self.assertTrue(caught.exception.cancelled)
+        self.assertFalse(os.path.exists(plan.project_path))
+
+    def test_failure_rolls_back_only_created_folders(self):
+        existing = os.path.join(self.category, "Site A", "Recordings")
+        os.makedirs(existing)
+        with open(os.path.join(existing, "keep.wav"), "w") as f:
+            f.write("recording")
+        plan = self.plan()
+        real_mkdir = os.mkdir
+
+        def failing_mkdir(path, *args, **kwargs):
+            if path.endswith(os.path.join("Pictures", "Mode2")):
+                raise PermissionError("denied")
+            return real_mkdir(path, *args, **kwargs)
+
+        with mock.patch("os.mkdir", failing_mkdir), self.assertRaises(CreationFailed) as caught:
+            create_project(plan)
+        self.assertFalse(caught.exception.cancelled)
+        self.assertTrue(os.path.isfile(os.path.join(existing, "keep.wav")))
+        self.assertFalse(os.path.exists(os.path.join(existing, "Mode1")))
+        self.assertFalse(os.path.exists(os.path.join(self.category, "Site A", "Pictures")))
+
+    def test_staged_publishes_at_once(self):
+        plan = self.plan()
+        report = create_project(plan, staged=True)
+        self.assertTrue(os.path.isdir(os.path.join(plan.project_path, "Pictures", "Mode2")))
+        self.assertEqual(len(report.created), len(plan))
+        self.assertEqual(os.listdir(os.path.join(self.main_folder, STAGING_FOLDER)), [])
+
+    def test_staged_never_merges_into_an_existing_project(self):
+        existing = os.path.join(self.category, "Site A")
+        os.makedirs(existing)
+        with self.assertRaises(CreationFailed) as caught:
+            create_project(self.plan(), staged=True)
+        self.assertIsInstance(caught.exception.reason, ProjectExistsError)
+        self.assertEqual(os.listdir(existing), [])
+        self.assertEqual(os.listdir(self.main_folder), ["Antennas"])  # refused before anything was staged
+
+
+if __name__ == "__main__":
+    unittest.main()
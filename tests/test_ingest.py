@@ -0,0 +1,127 @@
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+from ingest import (JOURNAL_FILE, PART_SUFFIX, IngestItem, RuleError, copy_verified, parse_rules, plan_ingest,
+                    run_ingest)
+
+
+class IngestTest(unittest.TestCase):
+    def setUp(self):
+        self.temp = tempfile.TemporaryDirectory()
+        self.project = os.path.join(self.temp.name, "Site A")
+        self.mode_folder = os.path.join(self.project, "Recordings", "Mode1")
+        os.makedirs(self.mode_folder)
+        os.makedirs(os.path.join(self.project, "Pictures"))
+        self.rules = parse_rules("mode = Mode1; ext = .wav .jpg")
+
+    def tearDown(self):
+        self.temp.cleanup()
+
+    def card(self, name, files):
+        folder = os.path.join(self.temp.name, name)
+        os.makedirs(folder)
+        for file_name, data in files.items():
+            with open(os.path.join(folder, file_name), "wb") as f:
+                f.write(data)
+        return folder
+
+    def ingest(self, card, cancel_event=None):
+        items, unmatched = plan_ingest(card, self.project, self.rules)
+        return run_ingest(items, self.project, workers=2, cancel_event=cancel_event)
+
+    def read(self, *path):
+        with open(os.path.join(*path), "rb") as f:
+            return f.read()
+
+    def test_rules(self):
+        rules = parse_rules("# comment\nmode = Mode A; ext = wav, .IQ; name = *_A_*\n\nmode = Mode B")
+        self.assertEqual((rules[0].mode, rules[0].extensions), ("Mode A", {".wav", ".iq"}))
+        self.assertTrue(rules[0].matches("x_a_1.WAV", 0))
+        self.assertFalse(rules[0].matches("x_b_1.wav", 0))
+        self.assertTrue(rules[1].matches("anything", 0))
+        for text in ("ext = .wav", "mode = A; colour = red", "mode A", "mode = A; from = yesterday",
+                     "mode = ../../escaped", "mode = a:b"):
+            with self.subTest(text=text), self.assertRaisesRegex(RuleError, "^line 1: "):
+                parse_rules(text)
+
+    def test_copies_into_the_mode_folders(self):
+        card = self.card("card", {"capture.wav": os.urandom(100000), "photo.jpg": b"jpeg", "notes.txt": b"x"})
+        os.utime(os.path.join(card, "capture.wav"), (1700000000, 1700000000))
+        items, unmatched = plan_ingest(card, self.project, self.rules)
+        self.assertEqual(unmatched, [os.path.join(card, "notes.txt")])
+        report = run_ingest(items, self.project, workers=2)
+        self.assertEqual((len(report.copied), report.failed), (2, []))
+        self.assertEqual(self.read(self.mode_folder, "capture.wav"), self.read(card, "capture.wav"))
+        self.assertEqual(self.read(self.project, "Pictures", "Mode1", "photo.jpg"), b"jpeg")
+        self.assertEqual(os.stat(os.path.join(self.mode_folder, "capture.wav")).st_mtime, 1700000000)
+
+        again = self.ingest(card)
+        self.assertEqual((len(again.copied), len(again.skipped)), (0, 2))
+
+    def test_copy_that_does_not_match_is_removed(self):
+        card = self.card("card", {"capture.wav": b"recording"})
+        with mock.patch("ingest.file_hash", return_value="0" * 64):
+            report = self.ingest(card)
+        self.assertEqual(len(report.failed), 1)
+        self.assertEqual(os.listdir(self.mode_folder), [])
+
+    def test_continues_a_part_file(self):
+        data = os.urandom(300000)
+        card = self.card("card", {"capture.wav": data})
+        item = IngestItem(os.path.join(card, "capture.wav"), os.path.join(self.mode_folder, "capture.wav"), "Mode1",
+                          len(data), os.stat(os.path.join(card, "capture.wav")).st_mtime)
+        with open(item.destination + PART_SUFFIX, "wb") as f:
+            f.write(data[:100000])
+        copied = []
+        copy_verified(item, copied.append)
+        self.assertEqual(sum(copied), len(data) - 100000)
+        self.assertEqual(self.read(item.destination), data)
+        self.assertEqual(os.listdir(self.mode_folder), ["capture.wav"])
+
+    def test_name_collision_keeps_both_files(self):
+        first = self.card("card 1", {"IMG_0001.wav": b"first card"})
+        second = self.card("card 2", {"IMG_0001.wav": b"second card"})
+        self.ingest(first)
+        report = self.ingest(second)
+        self.assertEqual(len(report.copied), 1)
+        self.assertEqual(self.read(self.mode_folder, "IMG_0001.wav"), b"first card")
+        self.assertEqual(self.read(self.mode_folder, "IMG_0001 (2).wav"), b"second card")
+        self.assertEqual(len(self.ingest(first).skipped), 1)
+
+    def test_cancel_creates_nothing(self):
+        card = self.card("card", {f"capture {number}.wav": b"x" * 1000 for number in range(5)})
+        cancel_event = threading.Event()
+        cancel_event.set()
+        report = self.ingest(card, cancel_event)
+        self.assertTrue(report.cancelled)
+        self.assertEqual((report.copied, report.failed), ([], []))
+        self.assertEqual(os.listdir(self.mode_folder), [])
+
+    def test_resumes_after_a_stop_before_the_journal_line(self):
+        card = self.card("card", {"capture.wav": os.urandom(100000)})
+        self.ingest(card)
+        journal = os.path.join(self.project, JOURNAL_FILE)
+        with open(journal, encoding="utf-8") as f:
+            claim = f.readline()
+        with open(journal, "w", encoding="utf-8") as f:
+            f.write(claim)  # the verified line was never written
+
+        report = self.ingest(card)
+        self.assertEqual((len(report.skipped), report.failed), (1, []))
+        self.assertEqual(os.listdir(self.mode_folder), ["capture.wav"])
+        self.assertEqual(len(self.ingest(card).skipped), 1)
+
+        with open(os.path.join(self.mode_folder, "capture.wav"), "wb") as f:
+            f.write(b"another file")
+        with open(journal, "w", encoding="utf-8") as f:
+            f.write(claim)
+        report = self.ingest(card)
+        self.assertEqual(len(report.failed), 1)  # never replaced
+        self.assertEqual(self.read(self.mode_folder, "capture.wav"), b"another file")
+
+
+if __name__ == "__main__":
+    unittest.main()
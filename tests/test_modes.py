@@ -0,0 +1,36 @@
+import os
+import tempfile
+import unittest
+
+from modes import ModeList, parse_modes_text, read_modes_file
+
+
+class ModeListTest(unittest.TestCase):
+    def test_keeps_order_and_skips_duplicates(self):
+        modes = ModeList(["Mode2", " Mode1 "])
+        added, skipped = modes.add_many(["Mode3", "Mode1", "  ", "Mode3"])
+        self.assertEqual((added, skipped), (["Mode3"], ["Mode1", "Mode3"]))
+        self.assertEqual(modes.to_list(), ["Mode2", "Mode1", "Mode3"])
+        self.assertIn(" Mode1", modes)
+        self.assertFalse(modes.add("Mode2"))
+
+    def test_remove_and_clear(self):
+        modes = ModeList(["Mode1", "Mode2"])
+        modes.remove("Mode1")
+        modes.remove("missing")
+        self.assertEqual(list(modes), ["Mode2"])
+        modes.clear()
+        self.assertEqual(len(modes), 0)
+        self.assertTrue(modes.add("Mode1"))  # can be added again after clear
+
+    def test_bulk_text(self):
+        self.assertEqual(parse_modes_text("Mode1, Mode2\r\nMode3\n\n,Mode4 "), ["Mode1", "Mode2", "Mode3", "Mode4"])
+        with tempfile.TemporaryDirectory() as temp:
+            path = os.path.join(temp, "modes.txt")
+            with open(path, "w", encoding="utf-8-sig") as f:  # Notepad's BOM
+                f.write("Mode1\nMode2")
+            self.assertEqual(read_modes_file(path), ["Mode1", "Mode2"])
+
+
+if __name__ == "__main__":
+    unittest.main()
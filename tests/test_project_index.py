@@ -0,0 +1,72 @@
+import os
+import tempfile
+import unittest
+
+from project_index import ProjectIndex, find_modes
+
+
+class ProjectIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.temp = tempfile.TemporaryDirectory()
+        self.main_folder = os.path.join(self.temp.name, "Iron Swords War")
+        self.antennas = os.path.join(self.main_folder, "Antennas")
+        self.radars = os.path.join(self.main_folder, "Radars")
+        os.makedirs(os.path.join(self.antennas, "Site A", "Recordings", "Mode1"))
+        os.makedirs(os.path.join(self.antennas, "Site A", "Pictures", "Mode2"))
+        os.makedirs(os.path.join(self.radars, "site a", "Mode3"))  # Modes only template
+        self.db_file = os.path.join(self.temp.name, "project_index.db")
+        self.index = ProjectIndex(self.main_folder, self.db_file)
+
+    def tearDown(self):
+        self.temp.cleanup()
+
+    def test_finds_modes(self):
+        self.assertEqual(find_modes(os.path.join(self.antennas, "Site A")), ["Mode1", "Mode2"])
+        self.assertEqual(find_modes(os.path.join(self.radars, "site a")), ["Mode3"])
+        self.assertEqual(find_modes(os.path.join(self.radars, "missing")), [])
+
+    def test_finds_the_same_name_in_every_category(self):
+        self.assertEqual(self.index.update(), 2)
+        found = sorted((project.category, project.name) for project in self.index.find(" SITE A "))
+        self.assertEqual(found, [("Antennas", "Site A"), ("Radars", "site a")])
+        self.assertEqual(self.index.find("Site B"), [])
+
+        reloaded = ProjectIndex(self.main_folder, self.db_file)
+        reloaded.load()  # from the database only, the share is not touched
+        self.assertEqual(len(reloaded.find("site a")), 2)
+        self.assertEqual(ProjectIndex(os.path.join(self.temp.name, "Other"), self.db_file).find("site a"), [])
+
+    def test_update_rescans_changed_categories_only(self):
+        self.index.update()
+        self.assertEqual(self.index.update(), 0)
+        os.makedirs(os.path.join(self.radars, "Site B"))
+        os.utime(self.radars, (1, 1))  # a new mtime, whatever the file system's resolution
+        self.assertEqual(self.index.update(), 1)
+        self.assertEqual(len(self.index.find("site b")), 1)
+
+        os.rename(self.radars, os.path.join(self.temp.name, "Radars"))
+        self.index.update()
+        self.assertEqual([project.category for project in self.index.find("site a")], ["Antennas"])
+
+    def test_new_project_is_found_before_the_next_update(self):
+        self.index.update()
+        project_path = os.path.join(self.antennas, "Site C")
+        os.makedirs(os.path.join(project_path, "Mode1"))
+        self.index.add_project(project_path, ["Mode1"])
+        [project] = self.index.find("site c")
+        os.makedirs(os.path.join(project_path, "Mode2"))
+        self.assertEqual(sorted(self.index.refresh_project(project).modes), ["Mode1", "Mode2"])
+
+        reloaded = ProjectIndex(self.main_folder, self.db_file)
+        reloaded.load()
+        self.assertEqual(sorted(reloaded.find("Site C")[0].modes), ["Mode1", "Mode2"])
+
+    def test_works_without_a_database(self):
+        index = ProjectIndex(self.main_folder, os.path.join(self.temp.name, "missing folder", "index.db"))
+        index.load()
+        index.add_project(os.path.join(self.antennas, "Site A"), [])
+        self.assertEqual(len(index.find("Site A")), 1)  # still found in memory
+
+
+if __name__ == "__main__":
+    unittest.main()
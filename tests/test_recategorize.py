@@ -0,0 +1,64 @@
+import os
+import tempfile
+import unittest
+
+from folder_plan import UNCATEGORIZED_FOLDER
+from recategorize import MoveJournal, list_uncategorized, move_projects, plan_moves, undo_last_batch
+
+
+class RecategorizeTest(unittest.TestCase):
+    def setUp(self):
+        self.temp = tempfile.TemporaryDirectory()
+        self.main_folder = os.path.join(self.temp.name, "Iron Swords War")
+        self.uncategorized = os.path.join(self.main_folder, UNCATEGORIZED_FOLDER)
+        self.category = os.path.join(self.main_folder, "Antennas")
+        for project in ("P1", "P2", "P3"):
+            os.makedirs(os.path.join(self.uncategorized, project, "Recordings"))
+        os.makedirs(os.path.join(self.category, "P2"))
+        self.journal = MoveJournal(os.path.join(self.temp.name, "journal.jsonl"))
+
+    def tearDown(self):
+        self.temp.cleanup()
+
+    def test_lists_uncategorized_projects(self):
+        self.assertEqual(list(list_uncategorized(self.main_folder)), ["P1", "P2", "P3"])
+        self.assertEqual(list_uncategorized(os.path.join(self.temp.name, "nothing")), {})
+
+    def test_move_reports_conflicts_and_never_overwrites(self):
+        moves = plan_moves(list(list_uncategorized(self.main_folder).values()), self.category)
+        report = move_projects(moves, self.journal)
+        self.assertEqual([os.path.basename(source) for source, destination in report.moved], ["P1", "P3"])
+        self.assertEqual([os.path.basename(source) for source, destination, reason in report.conflicts], ["P2"])
+        self.assertTrue(os.path.isdir(os.path.join(self.category, "P1", "Recordings")))
+        self.assertTrue(os.path.isdir(os.path.join(self.uncategorized, "P2", "Recordings")))
+        self.assertEqual(os.listdir(os.path.join(self.category, "P2")), [])
+
+    def test_moves_into_the_same_folder_are_skipped(self):
+        self.assertEqual(plan_moves([os.path.join(self.uncategorized, "P1")], self.uncategorized), [])
+
+    def test_undo_moves_the_last_batch_back(self):
+        first = move_projects(plan_moves([os.path.join(self.uncategorized, "P1")], self.category), self.journal)
+        second = move_projects(plan_moves([os.path.join(self.uncategorized, "P3")], self.category), self.journal)
+        self.assertEqual((len(first.moved), len(second.moved)), (1, 1))
+
+        report = undo_last_batch(self.journal)
+        self.assertEqual(len(report.moved), 1)
+        self.assertTrue(os.path.isdir(os.path.join(self.uncategorized, "P3")))
+        self.assertTrue(os.path.isdir(os.path.join(self.category, "P1")))  # the earlier batch is kept
+
+        undo_last_batch(self.journal)
+        self.assertTrue(os.path.isdir(os.path.join(self.uncategorized, "P1")))
+        self.assertEqual(self.journal.entries(), [])
+        self.assertEqual(undo_last_batch(self.journal).moved, [])
+
+    def test_undo_keeps_moves_that_cannot_be_undone(self):
+        move_projects(plan_moves([os.path.join(self.uncategorized, "P1")], self.category), self.journal)
+        os.makedirs(os.path.join(self.uncategorized, "P1"))  # the name has been taken again
+        report = undo_last_batch(self.journal)
+        self.assertEqual(report.moved, [])
+        self.assertEqual(len(report.conflicts), 1)
+        self.assertEqual(len(self.journal.entries()), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from settings import DEFAULT_MAIN_FOLDER, LEGACY_CONFIG_FILE, Settings, atomic_write
+
+
+class SettingsTest(unittest.TestCase):
+    def setUp(self):
+        self.temp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp.name, "settings.json")
+
+    def tearDown(self):
+        self.temp.cleanup()
+
+    def test_defaults_and_legacy_config(self):
+        self.assertEqual(Settings(self.path).get("main_folder"), DEFAULT_MAIN_FOLDER)
+        with open(os.path.join(self.temp.name, LEGACY_CONFIG_FILE), "w", encoding="utf-8") as f:
+            f.write("D:/Old Main Folder\n")
+        settings = Settings(self.path)
+        self.assertEqual(settings.get("main_folder"), "D:/Old Main Folder")
+        self.assertFalse(settings.get("staged_creation"))
+
+    def test_set_saves_and_notifies(self):
+        settings = Settings(self.path)
+        changes = []
+        settings.subscribe("main_folder", changes.append)
+        settings.set("main_folder", "D:/New")
+        settings.set("main_folder", "D:/New")  # unchanged, not saved or notified again
+        self.assertEqual(changes, ["D:/New"])
+        self.assertEqual(Settings(self.path).get("main_folder"), "D:/New")
+        self.assertEqual(os.listdir(self.temp.name), ["settings.json"])
+
+    def test_empty_and_invalid_values_are_ignored(self):
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump({"main_folder": ""}, f)
+        self.assertEqual(Settings(self.path).get("main_folder"), DEFAULT_MAIN_FOLDER)
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write("{not json")
+        self.assertEqual(Settings(self.path).get("main_folder"), DEFAULT_MAIN_FOLDER)
+
+    def test_failed_write_keeps_the_old_file(self):
+        atomic_write(self.path, lambda f: f.write("old"))
+
+        def failing_write(f):
+            f.write("half")
+            raise OSError("disk full")
+
+        with self.assertRaises(OSError):
+            atomic_write(self.path, failing_write)
+        with mock.patch("os.replace", side_effect=OSError("denied")), self.assertRaises(OSError):
+            atomic_write(self.path, lambda f: f.write("new"))
+        with open(self.path, encoding="utf-8") as f:
+            self.assertEqual(f.read(), "old")
+        self.assertEqual(os.listdir(self.temp.name), ["settings.json"])  # no temp file is left behind
+
+
+if __name__ == "__main__":
+    unittest.main()
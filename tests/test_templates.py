@@ -0,0 +1,61 @@
+import os
+import tempfile
+import unittest
+
+from templates import (DEFAULT_TEMPLATE_NAME, MODES_ONLY_TEMPLATE_NAME, FolderTemplate, TemplateError,
+                       builtin_templates, load_templates, parse_templates)
+
+
+class TemplatesTest(unittest.TestCase):
+    def test_parse(self):
+        templates, errors = parse_templates("# comment\n[Logs]\n{mode}/Logs\n\n[Dated]\n{date}/Recordings/{mode}\n")
+        self.assertEqual((list(templates), errors), (["Logs", "Dated"], []))
+
+    def test_invalid_templates_are_reported_and_the_rest_is_kept(self):
+        templates, errors = parse_templates("[Good]\n{mode}\n[Empty]\n[Parent]\n../{mode}\n[Absolute]\n/x\n"
+                                            "[Drive]\nC:/x\n[Unknown]\n{camera}\n[Format]\n{mode!r}\n"
+                                            "[Character]\na:b/{mode}\n[Brace]\n{mode\n")
+        self.assertEqual(list(templates), ["Good"])
+        self.assertEqual([error.split(":")[0] for error in errors],
+                         ["Empty", "Parent", "Absolute", "Drive", "Unknown", "Format", "Character", "Brace"])
+        with self.assertRaises(TemplateError):
+            parse_templates("{mode}\n[After]\n{mode}")  # a folder before any [Template Name]
+
+    def test_expansion_order(self):
+        template = FolderTemplate("Dated", ["{date}/Recordings/{mode}", "{date}/Pictures/{mode}", "{project} notes"])
+        self.assertEqual(template.expand("Site A", ["Mode2", "Mode1"], "2024-05-01"),
+                         (("2024-05-01",), ("2024-05-01", "Recordings"), ("2024-05-01", "Recordings", "Mode2"),
+                          ("2024-05-01", "Recordings", "Mode1"), ("2024-05-01", "Pictures"),
+                          ("2024-05-01", "Pictures", "Mode2"), ("2024-05-01", "Pictures", "Mode1"),
+                          ("Site A notes",)))
+
+    def test_no_modes(self):
+        templates = builtin_templates()
+        self.assertEqual(templates[DEFAULT_TEMPLATE_NAME].expand("Site A", [], "2024-05-01"),
+                         (("Recordings",), ("Pictures",)))  # the folders before {mode} are still created
+        self.assertEqual(templates[MODES_ONLY_TEMPLATE_NAME].expand("Site A", [], "2024-05-01"), ())
+        self.assertEqual(FolderTemplate("Nested", ["Raw/{mode}/Logs"]).expand("Site A", [], "2024-05-01"),
+                         (("Raw",),))
+
+    def test_load_templates_file(self):
+        with tempfile.TemporaryDirectory() as temp:
+            path = os.path.join(temp, "templates.txt")
+            templates, errors = load_templates(path)
+            self.assertEqual((set(templates), errors), ({DEFAULT_TEMPLATE_NAME, MODES_ONLY_TEMPLATE_NAME}, []))
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("[Logs]\n{mode}/Logs\n[Bad]\n..\n")
+            templates, errors = load_templates(path)
+            self.assertIn("Logs", templates)
+            self.assertIn(DEFAULT_TEMPLATE_NAME, templates)  # the built-in templates are always there
+            self.assertEqual(len(errors), 1)
+
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("[Other]\n{mode}\n")
+            os.utime(path, (1, 1))  # a different mtime, the file is compiled again
+            templates, errors = load_templates(path)
+            self.assertIn("Other", templates)
+            self.assertNotIn("Logs", templates)
+
+
+if __name__ == "__main__":
+    unittest.main()